@@ -1,16 +1,70 @@
-import gradio as gr
+import time
+_IMPORT_START = time.perf_counter()
+
+import os
+import pickle
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 import numpy as np
 import librosa
-import tensorflow as tf
-import pickle
+
+from src.audio_reader import AudioReader
+from src.feature_registry import FeatureRegistry
+from src.formants import FormantTracker
+from src.harmonics import HarmonicAnalyzer
+from src.pitch_tracking import PitchTracker
+from src.result_cache import ResultCache
+from src.profiling import StageProfiler
+
+# TensorFlow and Gradio are imported where they are used, so importing this
+# module stays cheap and free of side effects. Models load on first use or
+# through an explicit load().
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+WEIGHTS_FILE = "BabyCry_CRNN_Attention_FinalLast.weights.h5"
+LABELS_FILE = "label_classes.pkl"
+AUTISM_FILE = "autism_anomaly_ocsvm.pkl"
+AUTISM_APPROX_FILE = "autism_anomaly_ocsvm_approx.pkl"
+# Single-file alternative to the files above (see src.model_bundle). When it
+# exists, labels, CRNN weights and the One-Class SVM come from it.
+BUNDLE_FILE = "babycry_models.bundle"
+BUNDLE_PATH = os.environ.get("BABYCRY_BUNDLE", os.path.join(MODEL_DIR, BUNDLE_FILE))
+
+# CRNN runtime: "keras" runs the weights file through model.predict and
+# "keras-compiled" through pre-traced (XLA where available) tf.functions,
+# see src.compiled_backend; the "tflite-*" backends run a model exported by
+# src.tflite_backend.
+CRNN_BACKENDS = ("keras-compiled", "keras", "tflite-float32", "tflite-float16", "tflite-int8")
+CRNN_BACKEND = os.environ.get("BABYCRY_BACKEND", "keras-compiled")
+
+model = None
+labels = None
+autism_pipeline = None
+autism_feature_cols = None
+
+_load_lock = threading.Lock()
+STARTUP_TIMES = {}
+_bundle = None
+
+# Opt-in stage timing: BABYCRY_PROFILE=timing|cprofile|tracemalloc, with
+# BABYCRY_PROFILE_EVERY=N to profile every Nth call and BABYCRY_PROFILE_DIR
+# to dump records. PROFILER.enable()/disable() do the same at run time.
+_profile_mode = os.environ.get("BABYCRY_PROFILE")
+PROFILER = StageProfiler(enabled=bool(_profile_mode),
+                         mode=None if _profile_mode in (None, "", "1", "timing") else _profile_mode,
+                         sample_every=int(os.environ.get("BABYCRY_PROFILE_EVERY", 1)),
+                         dump_dir=os.environ.get("BABYCRY_PROFILE_DIR"))
 
 # ======================================================================================
 # 1) BABY CRY CLASSIFIER
 # ======================================================================================
-labels = pickle.load(open("label_classes.pkl", "rb"))
+def build_babycry_model(num_classes=8, batch_size=None, unroll=False):
+    # batch_size/unroll only matter for export (see src.tflite_backend);
+    # the weights are the same either way.
+    import tensorflow as tf
 
-def build_babycry_model(num_classes=8):
-    inputs = tf.keras.layers.Input(shape=(128, 128, 1))
+    inputs = tf.keras.layers.Input(shape=(128, 128, 1), batch_size=batch_size)
     x = tf.keras.layers.Conv2D(64, 3, padding="same", activation="relu")(inputs)
     x = tf.keras.layers.BatchNormalization()(x)
     x = tf.keras.layers.MaxPooling2D(2)(x)
@@ -27,7 +81,7 @@ def build_babycry_model(num_classes=8):
     c = x.shape[3]
     x = tf.keras.layers.Reshape((int(t), int(c)))(x)
 
-    x = tf.keras.layers.Bidirectional(tf.keras.layers.LSTM(128, return_sequences=True))(x)
+    x = tf.keras.layers.Bidirectional(tf.keras.layers.LSTM(128, return_sequences=True, unroll=unroll))(x)
     att = tf.keras.layers.Dense(1, activation="tanh")(x)
     att = tf.keras.layers.Softmax(axis=1)(att)
     x = tf.keras.layers.Multiply()([x, att])
@@ -39,9 +93,56 @@ def build_babycry_model(num_classes=8):
 
     return tf.keras.Model(inputs, outputs)
 
-model = build_babycry_model(num_classes=len(labels))
-model.load_weights("BabyCry_CRNN_Attention_FinalLast.weights.h5")
-print("✅ BabyCry model loaded successfully!")
+def load_bundle():
+    # The memory-mapped model bundle, or None when there is none
+    global _bundle
+    if _bundle is None and os.path.exists(BUNDLE_PATH):
+        from src.model_bundle import ModelBundle
+        _bundle = ModelBundle(BUNDLE_PATH)
+    return _bundle
+
+def load_labels():
+    bundle = load_bundle()
+    if bundle is not None:
+        return np.array(bundle.component("crnn")["labels"])
+    with open(os.path.join(MODEL_DIR, LABELS_FILE), "rb") as f:
+        return pickle.load(f)
+
+def load_keras_model(num_classes):
+    crnn = build_babycry_model(num_classes=num_classes)
+    bundle = load_bundle()
+    if bundle is not None:
+        crnn.set_weights(bundle.arrays("crnn"))
+    else:
+        crnn.load_weights(os.path.join(MODEL_DIR, WEIGHTS_FILE))
+    return crnn
+
+def load_classifier(backend=None):
+    # The backend is fixed by the first call; `model` exposes the Keras
+    # predict(x, batch_size=..., verbose=...) signature either way.
+    global model, labels
+    if model is not None:
+        return model
+    with _load_lock:
+        if model is not None:
+            return model
+        backend = backend or CRNN_BACKEND
+        if backend not in CRNN_BACKENDS:
+            raise ValueError(f"Unknown CRNN backend '{backend}', expected one of {CRNN_BACKENDS}")
+        t0 = time.perf_counter()
+        classes = load_labels()
+        if backend == "keras":
+            crnn = load_keras_model(len(classes))
+        elif backend == "keras-compiled":
+            from src.compiled_backend import CompiledClassifier
+            crnn = CompiledClassifier(load_keras_model(len(classes)))
+        else:
+            from src.tflite_backend import TFLiteClassifier
+            crnn = TFLiteClassifier.for_backend(backend)
+        labels, model = classes, crnn
+        STARTUP_TIMES["classifier_load_s"] = time.perf_counter() - t0
+        print(f"✅ BabyCry model loaded successfully! ({backend}, {STARTUP_TIMES['classifier_load_s']:.2f}s)")
+        return model
 
 
 # ======================================================================================
@@ -52,21 +153,186 @@ FRAME = 1024
 HOP = 256
 F0_MIN, F0_MAX, HYPER_F0 = 100, 800, 1000
 
-autism_bundle = pickle.load(open("autism_anomaly_ocsvm.pkl", "rb"))
-autism_pipeline = autism_bundle["pipeline"]
-autism_feature_cols = autism_bundle["features"]
-print("✅ Autism anomaly model loaded successfully!")
+# "pyin" is the reference tracker the One-Class SVM was trained with; "yin" is
+# the vectorized tracker in src.pitch_tracking (tens of ms per clip).
+F0_METHOD = os.environ.get("BABYCRY_F0_METHOD", "pyin")
+# "hpss" (what the One-Class SVM was trained on) or the cheaper "autocorr"
+HNR_METHOD = os.environ.get("BABYCRY_HNR_METHOD", "hpss")
+# "peak": F1/F2 from one LPC fit around the loudest frame (what the One-Class
+# SVM was trained on). "track": also F1/F2 mean and std over all voiced frames.
+FORMANT_MODE = os.environ.get("BABYCRY_FORMANTS", "peak")
 
-def compute_f0_features(y, sr=SR):
-    f0, _, _ = librosa.pyin(y, fmin=F0_MIN, fmax=F0_MAX, sr=sr, frame_length=FRAME, hop_length=HOP)
+# One-Class SVM scorer: "exact" evaluates the pickled pipeline's decision
+# function as one matrix multiply, "approx" uses the Nystroem scorer fitted by
+# src.anomaly_scoring, and "sklearn" calls the pipeline itself.
+OCSVM_SCORERS = ("exact", "approx", "sklearn")
+OCSVM_SCORER = os.environ.get("BABYCRY_OCSVM", "exact")
+
+def load_anomaly_detector():
+    global autism_pipeline, autism_feature_cols
+    if autism_pipeline is not None:
+        return autism_pipeline
+    with _load_lock:
+        if autism_pipeline is not None:
+            return autism_pipeline
+        t0 = time.perf_counter()
+        if OCSVM_SCORER not in OCSVM_SCORERS:
+            raise ValueError(f"Unknown One-Class SVM scorer '{OCSVM_SCORER}', expected one of {OCSVM_SCORERS}")
+        bundle = load_bundle()
+        component = {"exact": "ocsvm", "approx": "ocsvm_approx"}.get(OCSVM_SCORER)
+        if bundle is not None and component and bundle.has(component):
+            # Straight from the mapped arrays: no pickle, no scikit-learn import
+            from src.anomaly_scoring import RBFScorer
+            meta = bundle.component(component)
+            arrays = bundle.arrays(component)
+            autism_feature_cols = meta["features"]
+            autism_pipeline = RBFScorer(arrays["mean"], arrays["scale"], arrays["centers"],
+                                        arrays["weights"], meta["intercept"], meta["gamma"])
+        else:
+            with open(os.path.join(MODEL_DIR, AUTISM_FILE), "rb") as f:
+                saved = pickle.load(f)
+            pipeline = saved["pipeline"]
+            if OCSVM_SCORER == "approx":
+                with open(os.path.join(MODEL_DIR, AUTISM_APPROX_FILE), "rb") as f:
+                    pipeline = pickle.load(f)["scorer"]
+            elif OCSVM_SCORER == "exact":
+                from src.anomaly_scoring import RBFScorer
+                try:
+                    pipeline = RBFScorer.exact(pipeline)
+                except (ValueError, AttributeError):
+                    pass  # not a scaler + rbf OneClassSVM pipeline; use it as is
+            autism_feature_cols = saved["features"]
+            autism_pipeline = pipeline
+        STARTUP_TIMES["anomaly_load_s"] = time.perf_counter() - t0
+        print(f"✅ Autism anomaly model loaded successfully! ({STARTUP_TIMES['anomaly_load_s']:.2f}s)")
+        return autism_pipeline
+
+def load():
+    # Loads both models up front, e.g. when a server starts.
+    load_classifier()
+    load_anomaly_detector()
+
+# Gate settings. The gates keep their own framing (librosa's 2048/512
+# defaults) and F0 range rather than the FRAME/HOP tracks the anomaly
+# features use: an F0 track with fmin=100 often follows a subharmonic of a
+# high cry, and thresholding it at 200 Hz rejects real cries.
+GATE_FRAME = 2048
+GATE_HOP = 512
+GATE_F0_MIN = 200
+GATE_F0_MAX = 800
+SILENCE_RMS = 0.005
+MIN_VOICED_RATIO = 0.2
+
+F0_KEYS = ['f0_mean','f0_std','f0_median','f0_iqr','f0_cv',
+           'f0_jitter','f0_voiced_ratio','f0_hyper_ratio']
+
+
+class AnalysisContext:
+    """One decoded clip and the representations derived from it.
+
+    Every representation is computed on first use and kept, so callers
+    that ask for the same one twice (the feature producers, the result
+    cache, streaming, the visualisations) do not recompute it. The gates
+    read gate_rms() and gate_f0(), which use the gates' own framing so
+    their decisions do not change; they share nothing with the feature
+    tracks.
+    """
+
+    def __init__(self, y, sr=SR, f0_method=None):
+        self.y = y
+        self.sr = sr
+        self.f0_method = f0_method or F0_METHOD
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, path, sr=SR, f0_method=None):
+        return cls(load_audio(path, sr), sr, f0_method)
+
+    def prime(self, **values):
+        # Seed representations computed elsewhere, e.g. an incremental log-mel.
+        self._cache.update(values)
+        return self
+
+    def cached(self, *names):
+        # The named representations that have already been computed.
+        return {n: self._cache[n] for n in names if n in self._cache}
+
+    def _get(self, key, fn):
+        if key not in self._cache:
+            with PROFILER.stage(key):
+                self._cache[key] = fn()
+        return self._cache[key]
+
+    def stft_mag(self):
+        return self._get("stft_mag", lambda: np.abs(
+            librosa.stft(self.y, n_fft=FRAME, hop_length=HOP)))
+
+    def rms(self):
+        return self._get("rms", lambda: librosa.feature.rms(
+            y=self.y, frame_length=FRAME, hop_length=HOP)[0])
+
+    def f0(self):
+        return self._get("f0", lambda: PitchTracker.track(
+            self.y, self.sr, F0_MIN, F0_MAX, frame_length=FRAME,
+            hop_length=HOP, method=self.f0_method))
+
+    def gate_rms(self):
+        return self._get("gate_rms", lambda: librosa.feature.rms(
+            y=self.y, frame_length=GATE_FRAME, hop_length=GATE_HOP)[0])
+
+    def gate_f0(self):
+        return self._get("gate_f0", lambda: PitchTracker.track(
+            self.y, self.sr, GATE_F0_MIN, GATE_F0_MAX, frame_length=GATE_FRAME,
+            hop_length=GATE_HOP, method=self.f0_method))
+
+    def harmonic(self):
+        return self._get("harmonic", lambda: HarmonicAnalyzer.harmonic(self.y))
+
+    def hnr(self):
+        return self._get("hnr", lambda: HarmonicAnalyzer.hnr(
+            self.y, self.sr, HNR_METHOD, self.harmonic() if HNR_METHOD == "hpss" else None))
+
+    def preemphasized(self):
+        return self._get("preemphasized", lambda: librosa.effects.preemphasis(self.y))
+
+    def formants(self, order=12):
+        # (n_frames, 2) F1/F2 track on the F0 frame grid, NaN when unvoiced
+        def track():
+            f0 = self.f0()
+            voiced = None if f0 is None else np.isfinite(f0)
+            return FormantTracker.track(self.preemphasized(), self.sr, voiced, order, FRAME, HOP)
+        return self._get(f"formants_{order}" if order != 12 else "formants", track)
+
+    def logmel(self):
+        return self._get("logmel", lambda: extract_logmel(self.y, self.sr))
+
+
+def _as_context(y, sr=SR):
+    return y if isinstance(y, AnalysisContext) else AnalysisContext(y, sr)
+
+# Each anomaly feature, the producer that computes it and the AnalysisContext
+# representations that producer reads. extract_all_features_vector asks for
+# the One-Class SVM's columns only, so e.g. a model without "hnr" never runs
+# HPSS and the formant track is computed only when a model uses its stats.
+ANOMALY_FEATURES = FeatureRegistry(intermediates=dict(
+    stft_mag=(), rms=(), f0=(), preemphasized=(), harmonic=(),
+    hnr=("harmonic",) if HNR_METHOD == "hpss" else (), formants=("f0", "preemphasized")))
+
+ENERGY_KEYS = ['rms_mean', 'rms_std', 'rms_cv', 'silence_ratio']
+SPECTRAL_KEYS = ['sc_mean', 'sc_std', 'sc_cv', 'flat_mean', 'flat_std', 'hnr']
+FORMANT_KEYS = ['F1', 'F2']
+FORMANT_TRACK_KEYS = ['F1_mean', 'F1_std', 'F2_mean', 'F2_std']
+
+@ANOMALY_FEATURES.producer("f0", F0_KEYS, needs=("f0",))
+@PROFILER.timed("f0_features")
+def _f0_stats(ctx):
+    f0 = ctx.f0()
     if f0 is None:
-        return dict.fromkeys(['f0_mean','f0_std','f0_median','f0_iqr','f0_cv',
-                              'f0_jitter','f0_voiced_ratio','f0_hyper_ratio'], 0.0)
+        return dict.fromkeys(F0_KEYS, 0.0)
     valid = ~np.isnan(f0)
     f0_v = f0[valid]
     if len(f0_v) == 0:
-        return dict.fromkeys(['f0_mean','f0_std','f0_median','f0_iqr','f0_cv',
-                              'f0_jitter','f0_voiced_ratio','f0_hyper_ratio'], 0.0)
+        return dict.fromkeys(F0_KEYS, 0.0)
     f0_mean = np.mean(f0_v)
     f0_std = np.std(f0_v)
     f0_median = np.median(f0_v)
@@ -81,8 +347,10 @@ def compute_f0_features(y, sr=SR):
                 f0_iqr=f0_iqr, f0_cv=f0_cv, f0_jitter=jitter,
                 f0_voiced_ratio=voiced_ratio, f0_hyper_ratio=hyper_ratio)
 
-def compute_energy_pause_features(y):
-    rms = librosa.feature.rms(y=y, frame_length=FRAME, hop_length=HOP)[0]
+@ANOMALY_FEATURES.producer("energy", ENERGY_KEYS, needs=("rms",))
+@PROFILER.timed("energy_features")
+def _energy_stats(ctx):
+    rms = ctx.rms()
     rms_mean = np.mean(rms)
     rms_std = np.std(rms)
     rms_cv = rms_std / (rms_mean + 1e-9)
@@ -90,21 +358,29 @@ def compute_energy_pause_features(y):
     silence_ratio = np.mean(rms < thr)
     return dict(rms_mean=rms_mean, rms_std=rms_std, rms_cv=rms_cv, silence_ratio=silence_ratio)
 
-def compute_spectral_features(y, sr=SR):
-    S = np.abs(librosa.stft(y, n_fft=FRAME, hop_length=HOP))
-    sc = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
+@ANOMALY_FEATURES.producer("centroid", SPECTRAL_KEYS[:3], needs=("stft_mag",))
+@PROFILER.timed("spectral_features")
+def _centroid_stats(ctx):
+    sc = librosa.feature.spectral_centroid(S=ctx.stft_mag(), sr=ctx.sr)[0]
     sc_mean, sc_std = np.mean(sc), np.std(sc)
-    sc_cv = sc_std / (sc_mean + 1e-9)
-    flatness = librosa.feature.spectral_flatness(S=S)[0]
-    flat_mean, flat_std = np.mean(flatness), np.std(flatness)
-    harm = librosa.effects.harmonic(y)
-    noise = y - harm
-    hnr = (np.mean(np.abs(harm)) + 1e-9) / (np.mean(np.abs(noise)) + 1e-9)
-    return dict(sc_mean=sc_mean, sc_std=sc_std, sc_cv=sc_cv,
-                flat_mean=flat_mean, flat_std=flat_std, hnr=hnr)
+    return dict(sc_mean=sc_mean, sc_std=sc_std, sc_cv=sc_std / (sc_mean + 1e-9))
 
-def lpc_formants(y, sr=SR, lpc_order=12):
-    y2 = librosa.effects.preemphasis(y)
+@ANOMALY_FEATURES.producer("flatness", SPECTRAL_KEYS[3:5], needs=("stft_mag",))
+@PROFILER.timed("spectral_features")
+def _flatness_stats(ctx):
+    flatness = librosa.feature.spectral_flatness(S=ctx.stft_mag())[0]
+    return dict(flat_mean=np.mean(flatness), flat_std=np.std(flatness))
+
+@ANOMALY_FEATURES.producer("hnr", SPECTRAL_KEYS[5:], needs=("hnr",))
+@PROFILER.timed("spectral_features")
+def _hnr(ctx):
+    return dict(hnr=ctx.hnr())
+
+def _formant_peak(ctx, lpc_order=12):
+    # F1/F2 from one LPC fit around the loudest pre-emphasised frame.
+    # Pre-emphasis changes the signal, so this RMS is not the shared one.
+    sr = ctx.sr
+    y2 = ctx.preemphasized()
     rms = librosa.feature.rms(y=y2, frame_length=FRAME, hop_length=HOP)[0]
     idx = np.argmax(rms)
     start = max(0, idx * HOP - FRAME)
@@ -124,74 +400,269 @@ def lpc_formants(y, sr=SR, lpc_order=12):
         F1, F2 = 0.0, 0.0
     return dict(F1=F1, F2=F2)
 
+ANOMALY_FEATURES.producer("formant_peak", FORMANT_KEYS, needs=("preemphasized",))(
+    PROFILER.timed("lpc")(_formant_peak))
+if FORMANT_MODE == "track":
+    ANOMALY_FEATURES.producer("formant_track", FORMANT_TRACK_KEYS, needs=("formants",))(
+        PROFILER.timed("lpc")(lambda ctx: FormantTracker.stats(ctx.formants())))
+
+def compute_f0_features(y, sr=SR):
+    return ANOMALY_FEATURES.compute(_as_context(y, sr), F0_KEYS)
+
+def compute_energy_pause_features(y):
+    return ANOMALY_FEATURES.compute(_as_context(y), ENERGY_KEYS)
+
+def compute_spectral_features(y, sr=SR):
+    return ANOMALY_FEATURES.compute(_as_context(y, sr), SPECTRAL_KEYS)
+
+def lpc_formants(y, sr=SR, lpc_order=12):
+    ctx = _as_context(y, sr)
+    feats = _formant_peak(ctx, lpc_order)
+    if FORMANT_MODE == "track":
+        feats.update(FormantTracker.stats(ctx.formants(lpc_order)))
+    return feats
+
 def extract_all_features_vector(y):
-    f = {}
-    f.update(compute_f0_features(y, SR))
-    f.update(compute_energy_pause_features(y))
-    f.update(compute_spectral_features(y, SR))
-    f.update(lpc_formants(y, SR))
-    return np.array([f[c] if c in f else 0.0 for c in autism_feature_cols],
-                    dtype=np.float32).reshape(1, -1)
+    # Only the producers of the One-Class SVM's columns run; a column no
+    # producer knows is 0.0, as before
+    load_anomaly_detector()
+    ctx = _as_context(y, SR)
+    return ANOMALY_FEATURES.vector(ctx, autism_feature_cols).reshape(1, -1)
 
 
 # ======================================================================================
 # 3) PREDICTION LOGIC
 # ======================================================================================
+CLIP_SECONDS = 2.5
+N_MELS = 128
+MEL_N_FFT = 2048
+MEL_HOP = 512
+
 def extract_logmel(y, sr):
-    y = y[:int(2.5 * sr)]
-    if len(y) < int(2.5 * sr):
-        y = np.pad(y, (0, int(2.5 * sr) - len(y)))
-    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, hop_length=512)
+    y = y[:int(CLIP_SECONDS * sr)]
+    if len(y) < int(CLIP_SECONDS * sr):
+        y = np.pad(y, (0, int(CLIP_SECONDS * sr) - len(y)))
+    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=N_MELS, n_fft=MEL_N_FFT, hop_length=MEL_HOP)
+    return normalize_logmel(mel)
+
+def normalize_logmel(mel):
+    # Mel power (N_MELS, frames) -> the (1, 128, 128, 1) tensor the CRNN expects
     logmel = librosa.power_to_db(mel, ref=np.max)
     logmel = librosa.util.fix_length(logmel, size=128, axis=1)
     logmel = (logmel - np.mean(logmel)) / (np.std(logmel) + 1e-9)
     return logmel[np.newaxis, ..., np.newaxis]
 
-def analyze(audio):
-    if audio is None:
-        return "No audio uploaded."
+# Bump when a change to the analysis code alters results for the same audio;
+# it is part of every result-cache key along with the model files.
+FEATURE_VERSION = 2
+
+RESULT_CACHE = ResultCache(max_items=int(os.environ.get("BABYCRY_CACHE_ITEMS", 256)),
+                           disk_dir=os.environ.get("BABYCRY_CACHE_DIR"))
+_fingerprint = None
+
+_decoded = OrderedDict()
+_decode_lock = threading.Lock()
+DECODE_MEMO_ITEMS = 8
+
+def load_audio(path, sr=SR):
+    # Decoded samples for a file, remembered for the last few files so that
+    # re-analysis and visualisation of the same upload decode it only once.
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns, sr)
+    with _decode_lock:
+        if key in _decoded:
+            _decoded.move_to_end(key)
+            return _decoded[key]
+    with PROFILER.stage("decode"):
+        y, _ = AudioReader.load(path, sr)
+    with _decode_lock:
+        _decoded[key] = y
+        while len(_decoded) > DECODE_MEMO_ITEMS:
+            _decoded.popitem(last=False)
+    return y
+
+def model_fingerprint():
+    # Digest of everything besides the audio that determines a result.
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{FEATURE_VERSION}|{CRNN_BACKEND}|{HNR_METHOD}|{FORMANT_MODE}|{OCSVM_SCORER}".encode())
+        weights = WEIGHTS_FILE if CRNN_BACKEND.startswith("keras") else \
+            f"BabyCry_CRNN_Attention_{CRNN_BACKEND.split('-', 1)[1]}.tflite"
+        approx = (AUTISM_APPROX_FILE,) if OCSVM_SCORER == "approx" else ()
+        names = (weights, LABELS_FILE, AUTISM_FILE) + approx
+        bundle = load_bundle()
+        if bundle is not None:
+            # The manifest's checksums stand in for the bundled files
+            h.update(json.dumps(bundle.manifest["arrays"], sort_keys=True).encode())
+            names = tuple(n for n in names if n.endswith(".tflite")
+                          or (n == AUTISM_APPROX_FILE and not bundle.has("ocsvm_approx")))
+        for name in names:
+            path = os.path.join(MODEL_DIR, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    h.update(f.read())
+        _fingerprint = h.hexdigest()
+    return _fingerprint
+
+def cache_stats():
+    # hits, disk_hits, misses, evictions, items and hit_rate of RESULT_CACHE
+    return RESULT_CACHE.stats()
+
+MSG_NO_AUDIO = "No audio uploaded."
+MSG_SILENCE = "🟦 No cry detected (silence/background)."
+MSG_NON_CRY = "🟨 No cry pattern detected (non-cry sound)."
+BATCH_SIZE = 64
+
+def _load_context(audio):
+    # File paths are decoded at SR; arrays are taken to be mono at SR already.
+    if isinstance(audio, AnalysisContext):
+        return audio
+    if isinstance(audio, np.ndarray):
+        return AnalysisContext(np.asarray(audio, dtype=np.float32), SR)
+    return AnalysisContext.from_file(audio)
+
+def cry_gate(ctx):
+    # Returns the rejection message, or None when the clip looks like a cry.
+
+    # Silence filter
+    with PROFILER.stage("silence_gate"):
+        rms = np.mean(ctx.gate_rms())
+    if rms < SILENCE_RMS:
+        return MSG_SILENCE
 
+    # Cry-structure filter
+    with PROFILER.stage("voicing_gate"):
+        voiced_ratio = np.mean(~np.isnan(ctx.gate_f0()))
+    if voiced_ratio < MIN_VOICED_RATIO:
+        return MSG_NON_CRY
+    return None
+
+@PROFILER.timed("crnn")
+def classify_logmels(logmels):
+    # (n, 128, 128, 1) log-mel batch -> (n, n_classes) class probabilities
+    load_classifier()
+    return model.predict(logmels, batch_size=len(logmels), verbose=0)
+
+@PROFILER.timed("ocsvm")
+def anomaly_scores(vectors):
+    # (n, n_features) acoustic vectors -> One-Class SVM decision function
+    # (negative = atypical)
+    load_anomaly_detector()
+    return autism_pipeline.decision_function(vectors)
+
+def detect_anomalies(vectors):
+    # (n, n_features) acoustic vectors -> One-Class SVM labels (-1 = atypical)
+    return np.where(anomaly_scores(vectors) < 0, -1, 1)
+
+def _format_result(label, anomaly_score):
+    if anomaly_score == -1:
+        return f"🔴 Detected: {label}\n⚠️ Atypical cry pattern (possible developmental anomaly)."
+    return f"🟩 Detected: {label}\n✅ Typical cry pattern."
+
+def prepare_clip(audio):
+    # Everything per clip up to the model calls: decode, cache lookup,
+    # gates, log-mel and acoustic vector. Returns the final result string
+    # when no model call is needed, else a dict for score_clips().
+    if audio is None:
+        return MSG_NO_AUDIO
     try:
-        y, sr = librosa.load(audio, sr=16000)
-
-        # Silence filter
-        rms = np.mean(librosa.feature.rms(y=y))
-        if rms < 0.005:
-            return "🟦 No cry detected (silence/background)."
-
-        # Cry-structure filter
-        f0, _, _ = librosa.pyin(y, fmin=200, fmax=800, sr=sr)
-        voiced_ratio = np.mean(~np.isnan(f0))
-        if voiced_ratio < 0.2:
-            return "🟨 No cry pattern detected (non-cry sound)."
-
-        # Baby cry classification
-        feat = extract_logmel(y, sr)
-        pred = model.predict(feat, verbose=0)[0]
-        label = labels[np.argmax(pred)]
-
-        # Autism anomaly detection
-        acoustic_feat = extract_all_features_vector(y)
-        anomaly_score = autism_pipeline.predict(acoustic_feat)[0]
-
-        if anomaly_score == -1:
-            return f"🔴 Detected: {label}\n⚠️ Atypical cry pattern (possible developmental anomaly)."
-        else:
-            return f"🟩 Detected: {label}\n✅ Typical cry pattern."
+        ctx = _load_context(audio)
+        with PROFILER.stage("cache_lookup"):
+            key = RESULT_CACHE.key(ctx.y, ctx.sr, f"{model_fingerprint()}|{ctx.f0_method}")
+            entry = RESULT_CACHE.get(key)
+        if entry is not None:
+            return entry["result"]
+        msg = cry_gate(ctx)
+        if msg is not None:
+            RESULT_CACHE.put(key, dict(result=msg, **ctx.cached("f0")))
+            return msg
+        return dict(key=key, ctx=ctx, logmel=ctx.logmel(), vector=extract_all_features_vector(ctx))
+    except Exception as e:
+        return f"Error: {type(e).__name__}: {e}"
+
+def score_clips(prepared):
+    # Result strings for prepare_clip() outputs, with one CRNN forward pass
+    # and one One-Class SVM call for all clips that still need scoring.
+    results = [p if isinstance(p, str) else None for p in prepared]
+    ready = [i for i, p in enumerate(prepared) if not isinstance(p, str)]
+    if not ready:
+        return results
 
+    try:
+        load()
+        # Baby cry classification: one forward pass for the whole chunk
+        preds = classify_logmels(np.concatenate([prepared[i]["logmel"] for i in ready]))
+        # Autism anomaly detection: one pipeline call on the stacked rows
+        scores = anomaly_scores(np.vstack([prepared[i]["vector"] for i in ready]))
+        for i, pred, score in zip(ready, preds, scores):
+            p = prepared[i]
+            results[i] = _format_result(labels[np.argmax(pred)], -1 if score < 0 else 1)
+            RESULT_CACHE.put(p["key"], dict(result=results[i], probs=pred, vector=p["vector"],
+                                            anomaly_score=float(score), **p["ctx"].cached("f0", "logmel")))
+        if "first_prediction_s" not in STARTUP_TIMES:
+            STARTUP_TIMES["first_prediction_s"] = time.perf_counter() - _IMPORT_START
     except Exception as e:
-        return f"Error: {str(e)}"
+        for i in ready:
+            results[i] = f"Error: {type(e).__name__}: {e}"
+    return results
+
+def _analyze_chunk(items):
+    return score_clips([prepare_clip(audio) for audio in items])
+
+def analyze_batch(paths_or_arrays, batch_size=BATCH_SIZE):
+    """Analyze many clips, returning one result string per input, in order.
+
+    Inputs are file paths or mono float arrays at SR. Clips that pass the
+    gates are scored in chunks of ``batch_size``, each with a single CRNN
+    forward pass and a single One-Class SVM call.
+    """
+    items = list(paths_or_arrays)
+    results = []
+    with PROFILER.call("analyze_batch"):
+        for start in range(0, len(items), batch_size):
+            results.extend(_analyze_chunk(items[start:start + batch_size]))
+    return results
+
+def analyze(audio):
+    if audio is None:
+        return MSG_NO_AUDIO
+    with PROFILER.call("analyze"):
+        return analyze_batch([audio])[0]
+
+def analyze_with_timings(audio):
+    # Same as analyze(), also returning the per-stage timing record
+    # ({"stages": {name: {"total_s", "self_s", "count"}}, "total_s", ...})
+    # even when PROFILER is not enabled.
+    with PROFILER.call("analyze", force=True) as record:
+        result = analyze(audio)
+    return result, record
 
 
 # ======================================================================================
 # 4) GRADIO UI
 # ======================================================================================
-demo = gr.Interface(
-    fn=analyze,
-    inputs=gr.Audio(sources=["upload", "microphone"], type="filepath", label="Upload or Record Baby Cry"),
-    outputs=gr.Textbox(label="Analysis Result"),
-    title="👶 Baby Cry Analyzer",
-    description="Upload or record a baby's cry to classify emotional state and detect possible atypical cry patterns."
-)
-
-demo.launch()
+def build_demo():
+    # Thin client like the website UIs: the inference server
+    # (python -m src.inference_server) owns the models
+    import gradio as gr
+    from src.inference_client import analyze as client_analyze
+
+    return gr.Interface(
+        fn=client_analyze,
+        inputs=gr.Audio(sources=["upload", "microphone"], type="filepath", label="Upload or Record Baby Cry"),
+        outputs=gr.Textbox(label="Analysis Result"),
+        title="👶 Baby Cry Analyzer",
+        description="Upload or record a baby's cry to classify emotional state and detect possible atypical cry patterns."
+    )
+
+def startup_report():
+    # Seconds spent importing this module, loading each model, and from
+    # import until the first prediction was returned.
+    return dict(STARTUP_TIMES)
+
+
+STARTUP_TIMES["import_s"] = time.perf_counter() - _IMPORT_START
+
+if __name__ == "__main__":
+    build_demo().launch()
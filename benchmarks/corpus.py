@@ -0,0 +1,74 @@
+import json
+import os
+
+import numpy as np
+import soundfile as sf
+
+from src.pitch_tracking import PitchTracker
+
+# Bump when the generators change so stale corpora are rebuilt
+CORPUS_VERSION = 1
+SAMPLE_RATES = (16000, 44100, 48000)
+DURATIONS = (1.0, 2.5, 5.0, 10.0)
+
+def _band_noise(n, sr, rng, f1=100, f2=800):
+    # Band-limited "aircon/street" noise, as in the no_cry set of the notebook
+    Y = np.fft.rfft(rng.standard_normal(n))
+    freqs = np.fft.rfftfreq(n, 1 / sr)
+    Y[(freqs < f1) | (freqs > f2)] = 0
+    yb = np.fft.irfft(Y, n)
+    return yb / (np.max(np.abs(yb)) + 1e-9)
+
+def _clip(kind, sr, duration, rng):
+    n = int(sr * duration)
+    t = np.arange(n) / sr
+    if kind == "cry":
+        f0_start, f0_end = rng.uniform(300, 600, 2)
+        y, _ = PitchTracker.synthetic_cry(sr, duration, f0_start, f0_end, vibrato=rng.uniform(5, 30),
+                                          noise=rng.uniform(0.005, 0.05), seed=int(rng.integers(1 << 31)))
+        return y
+    if kind == "silence":
+        return np.zeros(n)
+    if kind == "room_hiss":
+        return 0.003 * rng.standard_normal(n)
+    if kind == "band_noise":
+        return 0.01 * _band_noise(n, sr, rng)
+    if kind == "mic_rubble":
+        env = (np.sin(2 * np.pi * 0.8 * t) + 1) / 2
+        return 0.004 * rng.standard_normal(n) * env
+    raise ValueError(f"Unknown clip kind '{kind}'")
+
+KINDS = ("cry", "silence", "room_hiss", "band_noise", "mic_rubble")
+
+def build_corpus(out_dir, n_per_kind=12, seed=0):
+    """Write a reproducible synthetic corpus to ``out_dir`` and return its manifest.
+
+    Clips go to ``out_dir/<kind>/`` (the layout DatasetBuilder expects), cycling
+    through SAMPLE_RATES and DURATIONS. Cry clips are harmonic tones with
+    random gliding F0 contours; the others mirror the notebook's no_cry set.
+    An existing corpus built with the same parameters is reused.
+    """
+    params = dict(version=CORPUS_VERSION, n_per_kind=n_per_kind, seed=seed)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest["params"] == params:
+            return manifest
+
+    rng = np.random.default_rng(seed)
+    files = []
+    for kind in KINDS:
+        os.makedirs(os.path.join(out_dir, kind), exist_ok=True)
+        for i in range(n_per_kind):
+            sr = SAMPLE_RATES[i % len(SAMPLE_RATES)]
+            duration = DURATIONS[(i // len(SAMPLE_RATES)) % len(DURATIONS)]
+            rel = os.path.join(kind, f"{kind}_{i:03d}_{sr}hz_{duration:g}s.wav")
+            sf.write(os.path.join(out_dir, rel), _clip(kind, sr, duration, rng).astype(np.float32), sr,
+                     subtype="PCM_16")
+            files.append(dict(path=rel, kind=kind, sr=sr, duration=duration))
+
+    manifest = dict(params=params, files=files)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
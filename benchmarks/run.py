@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import BabyCryLast as core
+from benchmarks.corpus import build_corpus
+from src.audio_reader import AudioReader
+from src.dataset_builder import DatasetBuilder
+from src.feature_extraction import FeatureExtractor
+from src.result_cache import ResultCache
+
+# p50 slower than the baseline by more than this is reported as a regression
+REGRESSION_TOLERANCE = 0.10
+
+def _summary(times_s, items=None, peak_mb=None):
+    ms = 1000 * np.asarray(times_s)
+    items = len(times_s) if items is None else items
+    return dict(n=len(times_s), p50_ms=float(np.percentile(ms, 50)), p95_ms=float(np.percentile(ms, 95)),
+                p99_ms=float(np.percentile(ms, 99)), mean_ms=float(ms.mean()),
+                throughput_per_s=items / float(np.sum(times_s)), peak_mb=peak_mb)
+
+def _peak_mb(fn, *args):
+    # Peak Python/numpy allocation of one call, measured outside the timed runs
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def _time_each(fn, inputs, repeat):
+    times = []
+    for _ in range(repeat):
+        for x in inputs:
+            t0 = time.perf_counter()
+            fn(x)
+            times.append(time.perf_counter() - t0)
+    return times
+
+def _uncached(fn):
+    # Benchmarks must not measure result-cache or decode-memo hits
+    def run(x):
+        core._decoded.clear()
+        return fn(x)
+    return run
+
+def bench_analyze(paths, repeat):
+    # End-to-end analyze() per file, plus the per-stage breakdown
+    stages = {}
+    times = []
+    core.analyze(paths[0])  # warm-up (numba JIT in librosa)
+    for _ in range(repeat):
+        for p in paths:
+            core._decoded.clear()
+            t0 = time.perf_counter()
+            _, record = core.analyze_with_timings(p)
+            times.append(time.perf_counter() - t0)
+            for name, entry in record["stages"].items():
+                stages.setdefault(name, []).append(entry["self_s"])
+    result = _summary(times, peak_mb=_peak_mb(_uncached(core.analyze), paths[0]))
+    result["stages"] = {name: _summary(t) for name, t in sorted(stages.items())}
+    return result
+
+def bench_extract_all(clips, repeat):
+    fn = lambda c: FeatureExtractor.extract_all(*c)
+    fn(clips[0])  # warm-up
+    return _summary(_time_each(fn, clips, repeat), peak_mb=_peak_mb(fn, clips[0]))
+
+def bench_extract_batch(clips, repeat):
+    # One extract_batch call per sample rate; compare throughput with extract_all
+    groups = {}
+    for y, sr in clips:
+        groups.setdefault(sr, []).append(y)
+    batches = list(groups.items())
+    fn = lambda b: FeatureExtractor.extract_batch(b[1], b[0])
+    fn((batches[0][0], batches[0][1][:2]))  # warm-up
+    return _summary(_time_each(fn, batches, repeat), items=len(clips) * repeat,
+                    peak_mb=_peak_mb(fn, batches[0]))
+
+def bench_build_dataset(corpus_dir, repeat):
+    n = sum(len(files) for _, _, files in os.walk(corpus_dir)) - 1  # minus manifest.json
+    times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "features.csv")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            DatasetBuilder.build_dataset(out, corpus_dir)
+            times.append(time.perf_counter() - t0)
+    return _summary(times, items=n * repeat)
+
+def bench_crnn(batch_sizes, repeat):
+    rng = np.random.default_rng(0)
+    results = {}
+    for bs in batch_sizes:
+        x = rng.standard_normal((bs, core.N_MELS, core.N_MELS, 1)).astype(np.float32)
+        core.classify_logmels(x)  # warm-up
+        times = _time_each(core.classify_logmels, [x], repeat)
+        results[f"batch_{bs}"] = _summary(times, items=bs * len(times), peak_mb=_peak_mb(core.classify_logmels, x))
+    return results
+
+def run(corpus_dir, repeat=3, cases=("analyze", "extract_all", "extract_batch", "build_dataset", "crnn"),
+        n_per_kind=12):
+    manifest = build_corpus(corpus_dir, n_per_kind)
+    paths = [os.path.join(corpus_dir, f["path"]) for f in manifest["files"]]
+    # Results must be recomputed on every call
+    core.RESULT_CACHE = ResultCache(max_items=0)
+
+    report = dict(corpus=manifest["params"], repeat=repeat, started=time.time(), cases={})
+    models_ok = True
+    if "analyze" in cases or "crnn" in cases:
+        try:
+            core.load()
+        except Exception as e:
+            models_ok = False
+            print(f"⚠️ Models not available ({e}); skipping analyze and crnn")
+
+    if "analyze" in cases and models_ok:
+        report["cases"]["analyze"] = bench_analyze(paths, repeat)
+    clips = [AudioReader.load(p) for p in paths] if {"extract_all", "extract_batch"} & set(cases) else []
+    if "extract_all" in cases:
+        report["cases"]["extract_all"] = bench_extract_all(clips, repeat)
+    if "extract_batch" in cases:
+        report["cases"]["extract_batch"] = bench_extract_batch(clips, repeat)
+    if "build_dataset" in cases:
+        report["cases"]["build_dataset"] = bench_build_dataset(corpus_dir, 1)
+    if "crnn" in cases and models_ok:
+        report["cases"]["crnn"] = bench_crnn((1, 32), 10 * repeat)
+    return report
+
+def _rows(cases, prefix=""):
+    for name, entry in cases.items():
+        if "p50_ms" in entry:
+            yield prefix + name, entry
+            yield from _rows(entry.get("stages", {}), prefix + name + ".")
+        else:
+            yield from _rows(entry, prefix + name + ".")
+
+def print_report(report, baseline=None):
+    base = dict(_rows(baseline["cases"])) if baseline else {}
+    print(f"{'case':<34}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/s':>10}{'peak MB':>9}"
+          + ("   vs baseline" if base else ""))
+    regressions = []
+    for name, row in _rows(report["cases"]):
+        peak = f"{row['peak_mb']:9.1f}" if row.get("peak_mb") is not None else f"{'':9}"
+        line = (f"{name:<34}{row['n']:>6}{row['p50_ms']:10.2f}{row['p95_ms']:10.2f}{row['p99_ms']:10.2f}"
+                f"{row['throughput_per_s']:10.1f}{peak}")
+        if name in base and base[name]["p50_ms"] > 0:
+            change = row["p50_ms"] / base[name]["p50_ms"] - 1
+            line += f"   {change:+7.1%}"
+            if change > REGRESSION_TOLERANCE:
+                line += "  ⚠️"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on a synthetic corpus.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "babycry_bench_corpus"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--n-per-kind", type=int, default=12, help="clips per kind in the corpus")
+    cases = ["analyze", "extract_all", "extract_batch", "build_dataset", "crnn"]
+    parser.add_argument("--cases", nargs="+", default=cases, choices=cases)
+    parser.add_argument("--baseline", help="compare against this saved report")
+    parser.add_argument("--save", help="write this run's report here (e.g. as the new baseline)")
+    args = parser.parse_args()
+
+    report = run(args.corpus, args.repeat, args.cases, args.n_per_kind)
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = print_report(report, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        raise SystemExit(f"p50 regressions over {REGRESSION_TOLERANCE:.0%}: {', '.join(regressions)}")
@@ -0,0 +1,152 @@
+import numpy as np
+
+class RBFScorer:
+    # One-Class SVM decision function as a single matrix multiply:
+    #   f(x) = sum_j w_j exp(-gamma ||z - c_j||^2) + b,  z = (x - mean) / scale
+    # exact() takes c = support vectors and w = dual coefficients from the
+    # fitted scaler + rbf OneClassSVM pipeline, which reproduces
+    # pipeline.decision_function to float precision without libsvm's
+    # per-sample loop. approximate() uses a few Nystroem landmarks instead
+    # and fits w so the scores reproduce the exact decision function, which
+    # bounds scoring cost by the landmark count, not the support vectors.
+
+    def __init__(self, mean, scale, centers, weights, intercept, gamma):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.gamma = float(gamma)
+        self._center_sq = np.sum(self.centers ** 2, axis=1)
+
+    @staticmethod
+    def _parts(pipeline):
+        # (scaler, svm) of a StandardScaler + rbf OneClassSVM pipeline
+        steps = [step for _, step in pipeline.steps]
+        if len(steps) != 2 or type(steps[1]).__name__ != "OneClassSVM" or steps[1].kernel != "rbf":
+            raise ValueError("expected a StandardScaler + rbf OneClassSVM pipeline")
+        scaler, svm = steps
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(svm.support_vectors_.shape[1])
+        scale = scaler.scale_ if scaler.with_std else np.ones(svm.support_vectors_.shape[1])
+        return mean, scale, svm
+
+    @classmethod
+    def exact(cls, pipeline):
+        mean, scale, svm = cls._parts(pipeline)
+        return cls(mean, scale, svm.support_vectors_, svm.dual_coef_[0], svm.intercept_[0], svm._gamma)
+
+    @staticmethod
+    def sample_like(svm, n, seed=0):
+        # Points in scaled space around and between the support vectors and
+        # from the standardised feature distribution, which together cover
+        # both sides of the decision boundary.
+        rng = np.random.default_rng(seed)
+        S = svm.support_vectors_
+        d = S.shape[1]
+        k = n // 4
+        near = S[rng.integers(len(S), size=k)] + \
+            rng.choice([0.1, 0.3, 0.6, 1.0], size=(k, 1)) * rng.standard_normal((k, d))
+        spread = rng.standard_normal((k, d)) * rng.choice([0.5, 1.0, 1.5], size=(k, 1))
+        i, j = rng.integers(len(S), size=(2, k))
+        t = rng.uniform(size=(k, 1))
+        between = t * S[i] + (1 - t) * S[j]
+        mix = np.einsum("nk,nkd->nd", rng.dirichlet(np.ones(4), size=n - 3 * k),
+                        S[rng.integers(len(S), size=(n - 3 * k, 4))])
+        return np.vstack([near, spread, between, mix])
+
+    @classmethod
+    def approximate(cls, pipeline, n_components=64, n_samples=40000, floor=-4.0, alpha=1e-3, seed=0):
+        # Nystroem landmarks by k-means over support vectors and samples; a
+        # ridge fit of the exact scores (clipped at `floor`, since only the
+        # sign matters far from the boundary) gives one weight per landmark.
+        from sklearn.cluster import KMeans
+        from sklearn.kernel_approximation import Nystroem
+        from sklearn.linear_model import Ridge
+
+        mean, scale, svm = cls._parts(pipeline)
+        Z = cls.sample_like(svm, n_samples, seed)
+        target = np.maximum(svm.decision_function(Z), floor)
+        pool = np.vstack([svm.support_vectors_, Z[:5000]])
+        landmarks = KMeans(n_components, n_init=1, random_state=seed).fit(pool).cluster_centers_
+        nys = Nystroem(gamma=svm._gamma, n_components=n_components).fit(landmarks)
+        ridge = Ridge(alpha=alpha).fit(nys.transform(Z), target)
+        # Nystroem features are K(z, landmarks) @ normalization_.T, so the
+        # linear model folds into one weight per landmark
+        weights = nys.normalization_.T @ ridge.coef_
+        return cls(mean, scale, nys.components_, weights, ridge.intercept_, svm._gamma)
+
+    def decision_function(self, X):
+        Z = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        sq = np.sum(Z ** 2, axis=1)[:, None] + self._center_sq[None, :] - 2.0 * (Z @ self.centers.T)
+        return np.exp(-self.gamma * np.maximum(sq, 0.0)) @ self.weights + self.intercept
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def agreement(scorer, pipeline, X=None, n_samples=20000, margin=0.5, seed=1):
+    # Sign agreement with pipeline.predict, overall and within `margin` of
+    # the boundary, and correlation of the (clipped) scores. X are raw
+    # feature rows; without them, held-out samples like the fit's are used.
+    mean, scale, svm = RBFScorer._parts(pipeline)
+    if X is None:
+        X = RBFScorer.sample_like(svm, n_samples, seed) * scale + mean
+    ref = pipeline.decision_function(X)
+    got = scorer.decision_function(X)
+    same = (got >= 0) == (ref >= 0)
+    near = np.abs(ref) < margin
+    return dict(n=len(X), agreement=float(same.mean()),
+                boundary_agreement=float(same[near].mean()) if near.any() else float("nan"),
+                correlation=float(np.corrcoef(np.maximum(got, -4), np.maximum(ref, -4))[0, 1]),
+                max_abs_diff=float(np.abs(got - ref).max()))
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import pickle
+    import time
+
+    import BabyCryLast as core
+    # Pickle the scorer under its importable name, not __main__
+    from src.anomaly_scoring import RBFScorer, agreement
+
+    parser = argparse.ArgumentParser(description="Fit and check the approximate One-Class SVM scorer.")
+    parser.add_argument("--components", type=int, default=64, help="Nystroem landmarks")
+    parser.add_argument("--features", help="CSV with the One-Class SVM's named feature columns to check on "
+                                           "(not a DatasetBuilder CSV, whose columns are the CRNN-side features)")
+    parser.add_argument("--audio", nargs="+", help="recordings or folders to extract those features from and check on")
+    args = parser.parse_args()
+
+    with open(os.path.join(core.MODEL_DIR, core.AUTISM_FILE), "rb") as f:
+        bundle = pickle.load(f)
+    pipeline = bundle["pipeline"]
+    checks = {"held-out samples": None}
+    if args.features:
+        import pandas as pd
+        checks["real rows"] = pd.read_csv(args.features)[bundle["features"]].to_numpy(np.float64)
+    if args.audio:
+        from src.bulk_analyze import find_audio
+        paths = [p for a in args.audio for p in (find_audio(a) if os.path.isdir(a) else [a])]
+        checks["real clips"] = np.vstack([core.extract_all_features_vector(core.load_audio(p)) for p in paths])
+
+    exact = RBFScorer.exact(pipeline)
+    approx = RBFScorer.approximate(pipeline, args.components)
+    X = np.random.default_rng(0).standard_normal((100000, len(bundle["features"])))
+    for name, fn in [("sklearn", pipeline.decision_function), ("exact", exact.decision_function),
+                     ("approx", approx.decision_function)]:
+        t0 = time.perf_counter()
+        fn(X)
+        print(f"{name:>8}: {1000 * (time.perf_counter() - t0):7.1f} ms per 100k rows")
+    for name, rows in checks.items():
+        for label, scorer in [("exact", exact), ("approx", approx)]:
+            row = agreement(scorer, pipeline, rows)
+            print(f"{label:>8} on {name} ({row['n']}): agreement {row['agreement']:.4f}  "
+                  f"near boundary {row['boundary_agreement']:.3f}  corr {row['correlation']:.4f}  "
+                  f"max|Δ| {row['max_abs_diff']:.2e}")
+
+    out = os.path.join(core.MODEL_DIR, core.AUTISM_APPROX_FILE)
+    with open(out, "wb") as f:
+        pickle.dump(dict(scorer=approx, features=bundle["features"],
+                         agreement=agreement(approx, pipeline)), f)
+    print(f"✅ Saved {out}")
@@ -0,0 +1,39 @@
+import json
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+
+# Writes that readers never see half-done: the data goes to a temp file
+# next to the target, which replaces it only once it is complete. Used by
+# every on-disk format here (caches, model bundle, feature and log-mel
+# stores), together with check_format() for their format versions.
+
+@contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    # File object whose contents become `path` when the block exits
+    # normally; on an error the old file is kept and the temp file removed
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def write_json(path, obj, **kwargs):
+    with atomic_write(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, **kwargs)
+
+def write_pickle(path, obj):
+    with atomic_write(path) as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def check_format(found, supported, what, path, oldest=None):
+    # Rejects files from a newer format than this code reads, or older than
+    # `oldest` when an older layout can no longer be read
+    if found > supported:
+        raise ValueError(f"{path} has {what} format {found}; this code reads up to {supported}")
+    if oldest is not None and found < oldest:
+        raise ValueError(f"{path} has {what} format {found}, older than this code reads ({oldest}); rebuild it")
@@ -1,10 +1,120 @@
-import librosa
+import os
+import struct
+
+import numpy as np
+import soundfile as sf
+import soxr
+
+# soxr quality presets, slowest/best first. "soxr_hq" is librosa's default,
+# so it gives the same samples librosa.load(path, sr=...) does.
+RESAMPLE_QUALITIES = ("soxr_vhq", "soxr_hq", "soxr_mq", "soxr_lq", "soxr_qq")
+RESAMPLE_QUALITY = os.environ.get("BABYCRY_RESAMPLE", "soxr_hq")
+
+# WAV format tags and the sample dtype / scale of each PCM layout we map directly
+_WAVE_PCM, _WAVE_FLOAT, _WAVE_EXTENSIBLE = 0x0001, 0x0003, 0xFFFE
+_MMAP_LAYOUTS = {(_WAVE_PCM, 16): ("<i2", 1 / 32768), (_WAVE_PCM, 32): ("<i4", 1 / 2**31),
+                 (_WAVE_FLOAT, 32): ("<f4", None)}
 
 class AudioReader:
+    # Decoding layer for the project: float32 mono output at the requested
+    # rate. PCM WAV files are memory-mapped and only the requested range is
+    # touched; a file already at the target rate is not resampled, and a
+    # mono float WAV at the target rate is returned as a read-only view of
+    # the mapped file. Other formats go through soundfile, then librosa's
+    # audioread fallback.
+
+    @staticmethod
+    def _wav_layout(path):
+        # (format_tag, channels, sr, bits, data_offset, data_bytes) of a RIFF
+        # WAV, or None if the file is not a plain RIFF/WAVE file.
+        with open(path, "rb") as f:
+            riff = f.read(12)
+            if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+                return None
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    body = f.read(size)
+                    tag, channels, sr, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                    if tag == _WAVE_EXTENSIBLE and len(body) >= 26:
+                        tag = struct.unpack("<H", body[24:26])[0]
+                    fmt = (tag, channels, sr, bits)
+                    f.seek(size % 2, 1)
+                elif chunk_id == b"data":
+                    if fmt is None:
+                        return None
+                    data_offset = f.tell()
+                    available = os.fstat(f.fileno()).st_size - data_offset
+                    return fmt + (data_offset, min(size, available))
+                else:
+                    f.seek(size + size % 2, 1)
 
+    @staticmethod
+    def _read_mmap(path, offset, duration):
+        # Samples of a PCM WAV as float32 (frames, channels), or None when the
+        # layout is not one we map directly.
+        layout = AudioReader._wav_layout(path)
+        if layout is None:
+            return None
+        tag, channels, sr, bits, data_offset, data_bytes = layout
+        if (tag, bits) not in _MMAP_LAYOUTS or channels < 1:
+            return None
+        dtype, scale = _MMAP_LAYOUTS[(tag, bits)]
+        frame_bytes = channels * bits // 8
+        total = data_bytes // frame_bytes
+        start = min(int(offset * sr), total)
+        stop = total if duration is None else min(start + int(duration * sr), total)
+        if stop <= start:
+            return np.zeros((0, channels), dtype=np.float32), sr
+        frames = np.memmap(path, dtype=dtype, mode="r", offset=data_offset + start * frame_bytes,
+                           shape=(stop - start, channels))
+        if scale is None:
+            return np.asarray(frames), sr
+        return frames.astype(np.float32) * np.float32(scale), sr
+
+    @staticmethod
+    def _read_soundfile(path, offset, duration):
+        try:
+            with sf.SoundFile(path) as f:
+                sr = f.samplerate
+                if offset:
+                    f.seek(int(offset * sr))
+                frames = -1 if duration is None else int(duration * sr)
+                return f.read(frames=frames, dtype="float32", always_2d=True), sr
+        except sf.SoundFileRuntimeError:
+            # Formats libsndfile cannot read (e.g. m4a): librosa's audioread path
+            import librosa
+            y, sr = librosa.load(path, sr=None, mono=False, offset=offset, duration=duration)
+            return np.atleast_2d(y).T, sr
+
+    @staticmethod
+    def resample(y, orig_sr, target_sr, quality=None):
+        # Same output length as librosa.resample (ceil of the scaled length)
+        quality = quality or RESAMPLE_QUALITY
+        if quality not in RESAMPLE_QUALITIES:
+            raise ValueError(f"Unknown resample quality '{quality}', expected one of {RESAMPLE_QUALITIES}")
+        if orig_sr == target_sr:
+            return y
+        n = int(np.ceil(len(y) * target_sr / orig_sr))
+        y_hat = soxr.resample(y, orig_sr, target_sr, quality=quality)
+        if len(y_hat) < n:
+            y_hat = np.pad(y_hat, (0, n - len(y_hat)))
+        return np.asarray(y_hat[:n], dtype=np.float32)
 
     @staticmethod
-    def load(path, sr=None):
-        # sr=None = keep original sample rate
-        y, sr = librosa.load(path, sr=sr)
+    def load(path, sr=None, offset=0.0, duration=None, quality=None, mmap=True):
+        # sr=None = keep original sample rate. offset/duration in seconds.
+        read = None
+        if mmap:
+            read = AudioReader._read_mmap(path, offset, duration)
+        frames, native_sr = read if read is not None else AudioReader._read_soundfile(path, offset, duration)
+        y = frames[:, 0] if frames.shape[1] == 1 else frames.mean(axis=1, dtype=np.float32)
+        if sr is not None and sr != native_sr:
+            y = AudioReader.resample(np.ascontiguousarray(y), native_sr, sr, quality)
+        else:
+            sr = native_sr
         return y, sr
@@ -0,0 +1,153 @@
+import csv
+import glob
+import os
+import re
+import time
+from multiprocessing import get_context
+
+from src.atomic_io import atomic_write
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".m4a")
+FIELDS = ["path", "status", "label", "atypical", "result", "seconds"]
+
+def find_audio(root, extensions=AUDIO_EXTENSIONS):
+    return sorted(os.path.join(d, f) for d, _, files in os.walk(root)
+                  for f in files if f.lower().endswith(extensions))
+
+def parse_result(result):
+    # analyze() text -> (status, label, atypical)
+    import BabyCryLast as core
+
+    match = re.search(r"Detected: (\S+)", result)
+    if match:
+        return "cry", match.group(1), "Atypical" in result
+    if result == core.MSG_SILENCE:
+        return "silence", "", False
+    if result == core.MSG_NON_CRY:
+        return "non_cry", "", False
+    return "error", "", False
+
+def _init_worker(threads):
+    # One TensorFlow thread pool per worker would oversubscribe the cores
+    os.environ.setdefault("TF_NUM_INTRAOP_THREADS", str(threads))
+    os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+    import BabyCryLast as core
+    core.load()
+
+def _analyze_chunk(paths):
+    import BabyCryLast as core
+
+    t0 = time.perf_counter()
+    results = core.analyze_batch(paths)
+    seconds = (time.perf_counter() - t0) / max(len(paths), 1)
+    rows = []
+    for path, result in zip(paths, results):
+        status, label, atypical = parse_result(result)
+        rows.append(dict(path=path, status=status, label=label, atypical=atypical,
+                         result=result.replace("\n", " "), seconds=round(seconds, 4)))
+    return rows
+
+
+class CsvSink:
+    # Appends rows and flushes after every chunk, so a crash loses at most
+    # the chunks that were still in flight.
+
+    def __init__(self, path):
+        self.path = path
+
+    def done(self):
+        if not os.path.exists(self.path):
+            return set()
+        # Drop a row cut short by a crash mid-write
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        # The last row for a path wins, so a file that failed and was
+        # retried successfully counts as done
+        with open(self.path, newline="", encoding="utf-8") as f:
+            status = {row["path"]: row["status"] for row in csv.DictReader(f)}
+        return {path for path, s in status.items() if s != "error"}
+
+    def write(self, rows):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerows(rows)
+
+
+class ParquetSink:
+    # A directory of part files, one per chunk; read it back with
+    # pandas.read_parquet(path). Needs pyarrow or fastparquet.
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._part = len(glob.glob(os.path.join(path, "part-*.parquet")))
+
+    def done(self):
+        import pandas as pd
+
+        parts = sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+        if not parts:
+            return set()
+        rows = pd.concat([pd.read_parquet(p, columns=["path", "status"]) for p in parts])
+        status = rows.drop_duplicates("path", keep="last")
+        return set(status.loc[status["status"] != "error", "path"])
+
+    def write(self, rows):
+        import pandas as pd
+
+        final = os.path.join(self.path, f"part-{self._part:06d}.parquet")
+        with atomic_write(final) as f:
+            pd.DataFrame(rows, columns=FIELDS).to_parquet(f, index=False)
+        self._part += 1
+
+
+def bulk_analyze(root, out_path, workers=None, chunk_size=16, threads_per_worker=1, log_every=10):
+    """Analyze every audio file under ``root`` into ``out_path`` (.csv or a
+    .parquet directory), skipping files already recorded there. Files whose
+    last recorded status is "error" are analyzed again, and the new row is
+    appended after the old one.
+
+    Each worker process loads the models once and scores its chunks with
+    analyze_batch(). Returns (files processed this run, files/sec).
+    """
+    sink = ParquetSink(out_path) if out_path.endswith(".parquet") else CsvSink(out_path)
+    done = sink.done()
+    paths = [p for p in find_audio(root) if p not in done]
+    print(f"📂 {len(paths)} files to analyze ({len(done)} already done)")
+    if not paths:
+        return 0, 0.0
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    processed = 0
+    t0 = time.perf_counter()
+    with get_context("spawn").Pool(workers, initializer=_init_worker,
+                                   initargs=(threads_per_worker,)) as pool:
+        for i, rows in enumerate(pool.imap_unordered(_analyze_chunk, chunks), 1):
+            sink.write(rows)
+            processed += len(rows)
+            if i % log_every == 0 or processed == len(paths):
+                rate = processed / (time.perf_counter() - t0)
+                eta = (len(paths) - processed) / rate if rate else float("inf")
+                print(f"  {processed}/{len(paths)} files  {rate:6.1f} files/s  ETA {eta:6.0f} s")
+    rate = processed / (time.perf_counter() - t0)
+    print(f"✅ {processed} files in {time.perf_counter() - t0:.1f} s ({rate:.1f} files/s) -> {out_path}")
+    return processed, rate
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze every recording under a folder, resumably.")
+    parser.add_argument("root", help="folder to scan recursively")
+    parser.add_argument("out", help="results .csv, or a .parquet directory")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="files per analyze_batch call")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+    bulk_analyze(args.root, args.out, args.workers, args.chunk_size, args.threads_per_worker)
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+import BabyCryLast as core
+from src.profiling import latency_ms
+
+class CompiledClassifier:
+    # Drop-in for the Keras CRNN in core.classify_logmels without the
+    # per-call overhead of model.predict (data adapter, callbacks, step
+    # function lookup). Two tf.functions with fixed input signatures are
+    # traced once and warmed up here, so the first real request does not
+    # pay for tracing: a batch-of-one fast path, XLA-compiled when XLA is
+    # available, and a variable-batch path for analyze_batch.
+
+    def __init__(self, keras_model, jit_compile=True):
+        import tensorflow as tf
+
+        self.keras_model = keras_model
+        shape = tuple(keras_model.input_shape[1:])
+        call = lambda x: keras_model(x, training=False)
+        self._batch = tf.function(call, input_signature=[tf.TensorSpec((None,) + shape, tf.float32)],
+                                  reduce_retracing=True)
+        self.jit_compile = False
+        single = tf.TensorSpec((1,) + shape, tf.float32)
+        warm = np.zeros((1,) + shape, dtype=np.float32)
+        if jit_compile:
+            try:
+                self._single = tf.function(call, input_signature=[single], jit_compile=True)
+                self._single(warm)
+                self.jit_compile = True
+            except Exception:
+                # No XLA in this build, or an op without an XLA kernel
+                pass
+        if not self.jit_compile:
+            self._single = tf.function(call, input_signature=[single])
+            self._single(warm)
+        self._batch(np.zeros((2,) + shape, dtype=np.float32))
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if len(x) == 1:
+            return self._single(x).numpy()
+        return self._batch(x).numpy()
+
+
+def latency_report(repeats=100, batch_sizes=(1, 8)):
+    # p50/p99 of model.predict against the compiled paths on random
+    # log-mels, plus the largest probability difference between them.
+    keras_model = core.load_keras_model(len(core.load_labels()))
+    t0 = time.perf_counter()
+    compiled = CompiledClassifier(keras_model)
+    warmup_s = time.perf_counter() - t0
+    rng = np.random.default_rng(0)
+    report = dict(xla=compiled.jit_compile, warmup_s=warmup_s)
+    for bs in batch_sizes:
+        x = rng.standard_normal((bs, core.N_MELS, core.N_MELS, 1)).astype(np.float32)
+        keras_model.predict(x, verbose=0)
+        ref = keras_model.predict(x, batch_size=bs, verbose=0)
+        report[f"batch_{bs}"] = dict(
+            predict=latency_ms(lambda v: keras_model.predict(v, batch_size=bs, verbose=0), x, repeats),
+            compiled=latency_ms(compiled.predict, x, repeats),
+            max_abs_diff=float(np.abs(compiled.predict(x) - ref).max()))
+    return report
+
+
+if __name__ == "__main__":
+    # python -m src.compiled_backend
+    report = latency_report()
+    print(f"XLA: {report['xla']}  trace + warm-up: {report['warmup_s']:.2f} s")
+    for name, row in report.items():
+        if name.startswith("batch_"):
+            print(f"{name:>8}: model.predict p50 {row['predict'][0]:6.1f} ms  p99 {row['predict'][1]:6.1f} ms   "
+                  f"compiled p50 {row['compiled'][0]:6.1f} ms  p99 {row['compiled'][1]:6.1f} ms   "
+                  f"max|Δp| {row['max_abs_diff']:.2e}")
@@ -1,46 +1,184 @@
 import os
+import time
+from multiprocessing import get_context
+
+import numpy as np
 import pandas as pd
 from src.audio_reader import AudioReader
+from src.feature_cache import FeatureCache
 from src.feature_extraction import FeatureExtractor
+from src.feature_store import FeatureStore
 
 class DatasetBuilder:
-
+    # Clips batched together are padded to the longest; a batch never
+    # spans more than this ratio of lengths
+    MAX_PAD_RATIO = 1.25
 
     @staticmethod
-    def build_dataset(output_csv, *dataset_dirs):
-        features = []
-        labels = []
-
+    def list_files(*dataset_dirs):
+        # [(path, label)] in a fixed order: datasets as given, then class
+        # folders and files sorted by name
+        files = []
         for data_dir in dataset_dirs:
             # Each dataset is expected to have subfolders = class labels
-            for category in os.listdir(data_dir):
+            for category in sorted(os.listdir(data_dir)):
                 category_path = os.path.join(data_dir, category)
-
                 if not os.path.isdir(category_path):
                     continue
+                for filename in sorted(os.listdir(category_path)):
+                    if filename.endswith(".wav"):
+                        files.append((os.path.join(category_path, filename), category))
+        return files
 
-                for filename in os.listdir(category_path):
-                    if not filename.endswith(".wav"):
-                        continue
+    @staticmethod
+    def featurize(path, n_mfcc=20):
+        # (float32 features, None) or (None, error message)
+        try:
+            y, sr = AudioReader.load(path)
+            return FeatureExtractor.extract_all(y, sr, n_mfcc=n_mfcc).astype(np.float32), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
 
-                    file_path = os.path.join(category_path, filename)
+    @staticmethod
+    def _featurize_chunk(chunk):
+        # Clips of one sample rate and similar length go through
+        # extract_batch together (a clip unlike the others goes alone); if a
+        # batch fails, its files are redone one by one so the error lands
+        # on the file that caused it
+        start, paths, n_mfcc = chunk
+        rows = [None] * len(paths)
+        by_sr = {}
+        for i, path in enumerate(paths):
+            try:
+                y, sr = AudioReader.load(path)
+                by_sr.setdefault(sr, []).append((i, y))
+            except Exception as e:
+                rows[i] = (None, f"{type(e).__name__}: {e}")
+        for sr, items in DatasetBuilder._buckets(by_sr):
+            try:
+                X = FeatureExtractor.extract_batch([y for _, y in items], sr, n_mfcc=n_mfcc)
+                for (i, _), x in zip(items, X):
+                    rows[i] = (x, None)
+            except Exception:
+                for i, _ in items:
+                    rows[i] = DatasetBuilder.featurize(paths[i], n_mfcc)
+        return start, rows
 
-                    try:
-                        # Load audio
-                        y, sr = AudioReader.load(file_path)
+    @staticmethod
+    def _buckets(by_sr):
+        # [(sr, items)] with each group's items sorted by length and split
+        # so that longest / shortest <= MAX_PAD_RATIO within a bucket
+        buckets = []
+        for sr, items in by_sr.items():
+            bucket = []
+            for item in sorted(items, key=lambda it: len(it[1])):
+                if bucket and len(item[1]) > DatasetBuilder.MAX_PAD_RATIO * max(len(bucket[0][1]), 1):
+                    buckets.append((sr, bucket))
+                    bucket = []
+                bucket.append(item)
+            if bucket:
+                buckets.append((sr, bucket))
+        return buckets
 
-                        # Extract features
-                        feats = FeatureExtractor.extract_all(y, sr)
+    @staticmethod
+    def build_dataset(output_csv, *dataset_dirs, workers=1, chunk_size=32, log_every=10,
+                      n_mfcc=20, cache=None, cache_check="stat"):
+        """Featurize every WAV under ``dataset_dirs`` into ``output_csv``, or
+        into a FeatureStore directory when the path does not end in .csv.
 
-                        features.append(feats)
-                        labels.append(category)
+        With ``workers`` > 1, chunks of ``chunk_size`` files go to a process
+        pool; rows are written in list_files() order whatever the worker
+        count. Files that fail are left out and listed in the returned
+        report (and in ``<output>.errors.csv``).
 
-                    except Exception as e:
-                        print(f"Ошибка {file_path}: {e}")
-                        continue
+        With ``cache`` (a FeatureCache path), only files that are new,
+        changed, or were extracted with other settings are featurized.
+        """
+        t0 = time.perf_counter()
+        files = DatasetBuilder.list_files(*dataset_dirs)
+        results = [None] * len(files)
+        fingerprint = FeatureExtractor.fingerprint(n_mfcc)
+        store = FeatureCache(cache, cache_check) if cache else None
+        todo = []
+        for i, (path, _) in enumerate(files):
+            feats = store.get(path, fingerprint) if store else None
+            if feats is None:
+                todo.append(i)
+            else:
+                results[i] = (feats, None)
+        if store:
+            print(f"📂 {len(todo)} of {len(files)} files to featurize ({len(files) - len(todo)} cached)")
+        paths = [files[i][0] for i in todo]
+        # Chunks carry positions in `todo`; runs of cached files are skipped
+        chunks = [(i, paths[i:i + chunk_size], n_mfcc) for i in range(0, len(paths), chunk_size)]
+        done = 0
+
+        def collect(n_chunk, start, rows):
+            nonlocal done
+            for i, row in zip(todo[start:start + len(rows)], rows):
+                results[i] = row
+                if store and row[1] is None:
+                    store.put(files[i][0], fingerprint, row[0])
+            done += len(rows)
+            if store and n_chunk % log_every == 0:
+                store.save()
+            if n_chunk % log_every == 0 or done == len(paths):
+                rate = done / (time.perf_counter() - t0)
+                print(f"  {done}/{len(paths)} files  {rate:6.1f} files/s")
+
+        if workers > 1 and len(chunks) > 1:
+            with get_context("spawn").Pool(min(workers, len(chunks))) as pool:
+                for n, (start, rows) in enumerate(pool.imap_unordered(DatasetBuilder._featurize_chunk, chunks), 1):
+                    collect(n, start, rows)
+        else:
+            for n, chunk in enumerate(chunks, 1):
+                collect(n, *DatasetBuilder._featurize_chunk(chunk))
+        if store:
+            store.save()
+
+        features, labels, errors = [], [], []
+        for (path, label), (feats, error) in zip(files, results):
+            if error is None:
+                features.append(feats)
+                labels.append(label)
+            else:
+                errors.append(dict(path=path, error=error))
 
         # Save dataset
-        data = pd.DataFrame(features)
-        data["label"] = labels
-        data.to_csv(output_csv, index=False)
-        print(f"✅ Dataset saved to {output_csv} with {len(data)} samples.")
+        n_rows = len(features)
+        if not output_csv.lower().endswith(".csv"):
+            columns = [str(i) for i in range(len(features[0]))] if features else []
+            FeatureStore.create(output_csv, columns).append(np.reshape(features, (n_rows, len(columns))), labels)
+        else:
+            data = pd.DataFrame(features)
+            data["label"] = labels
+            data.to_csv(output_csv, index=False)
+        errors_csv = os.path.splitext(output_csv)[0] + ".errors.csv"
+        if errors:
+            pd.DataFrame(errors).to_csv(errors_csv, index=False)
+        elif os.path.exists(errors_csv):
+            os.remove(errors_csv)
+
+        seconds = time.perf_counter() - t0
+        report = dict(files=len(files), featurized=len(todo), cached=len(files) - len(todo), rows=n_rows,
+                      errors=errors, seconds=seconds, files_per_s=len(files) / seconds if seconds else 0.0)
+        print(f"✅ Dataset saved to {output_csv} with {n_rows} samples "
+              f"({report['files_per_s']:.1f} files/s, {len(errors)} failed).")
+        return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the feature CSV from class-labelled WAV folders.")
+    parser.add_argument("out", help="output .csv, or a feature store directory")
+    parser.add_argument("dirs", nargs="+", help="dataset folders with one subfolder per class")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32, help="files per task sent to a worker")
+    parser.add_argument("--n-mfcc", type=int, default=20)
+    parser.add_argument("--cache", help="feature cache file; reruns only featurize new or changed files")
+    parser.add_argument("--cache-check", choices=FeatureCache.CHECKS, default="stat",
+                        help="how a cached file is judged unchanged: size+mtime, or content hash")
+    args = parser.parse_args()
+    DatasetBuilder.build_dataset(args.out, *args.dirs, workers=args.workers, chunk_size=args.chunk_size,
+                                 n_mfcc=args.n_mfcc, cache=args.cache, cache_check=args.cache_check)
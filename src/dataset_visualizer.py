@@ -3,13 +3,14 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from sklearn.decomposition import PCA
+from src.feature_store import feature_columns, load_features
 
 class DatasetVisualizer:
    
 
     @staticmethod
     def class_distribution(csv_file):
-        data = pd.read_csv(csv_file)
+        data = load_features(csv_file, columns=[])
         counts = data["label"].value_counts()
 
         plt.figure(figsize=(8, 5))
@@ -25,7 +26,7 @@ class DatasetVisualizer:
 
     @staticmethod
     def pca_scatter(csv_file, sample_size=500):
-        data = pd.read_csv(csv_file)
+        data = load_features(csv_file)
         X = data.drop(columns=["label"])
         y = data["label"]
 
@@ -64,7 +65,7 @@ class DatasetVisualizer:
 
     @staticmethod
     def average_feature_bar(csv_file, n_features=5):
-        data = pd.read_csv(csv_file)
+        data = load_features(csv_file, columns=feature_columns(csv_file)[:n_features])
         features = data.drop(columns=["label"])
         labels = data["label"]
 
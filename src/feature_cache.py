@@ -0,0 +1,91 @@
+import hashlib
+import os
+import pickle
+
+from src.atomic_io import write_pickle
+
+class FeatureCache:
+    # Persistent per-file feature cache for DatasetBuilder: one pickle of
+    # {absolute path: entry}, where an entry holds the file's size, mtime,
+    # optional content hash, the extractor fingerprint and the features.
+    # An entry is reused while the fingerprint matches and the file looks
+    # unchanged: same size and mtime, or with check="hash" the same
+    # content. With check="hash" a path with no usable entry is also
+    # looked up by content, so a touched, copied, moved or renamed file
+    # still hits. Anything else is a miss and is overwritten on put().
+
+    CHECKS = ("stat", "hash")
+
+    def __init__(self, path, check="stat"):
+        if check not in self.CHECKS:
+            raise ValueError(f"Unknown cache check '{check}', expected one of {self.CHECKS}")
+        self.path = path
+        self.check = check
+        self._entries = {}
+        self._dirty = False
+        self.counters = dict(hits=0, misses=0, stale=0)
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    self._entries = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self._entries = {}
+        self._by_hash = {e["hash"]: e for e in self._entries.values() if e.get("hash")}
+
+    @staticmethod
+    def content_hash(path):
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def _stamp(self, path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path, fingerprint):
+        key = os.path.abspath(path)
+        entry = self._entries.get(key)
+        size, mtime = self._stamp(path)
+        digest = None
+        if entry is not None and entry["fingerprint"] == fingerprint:
+            if (size, mtime) == (entry["size"], entry["mtime"]):
+                self.counters["hits"] += 1
+                return entry["features"]
+            if self.check == "hash" and size == entry["size"]:
+                digest = self.content_hash(path)
+                if entry.get("hash") == digest:
+                    entry["mtime"] = mtime
+                    self._dirty = True
+                    self.counters["hits"] += 1
+                    return entry["features"]
+        if self.check == "hash":
+            digest = digest or self.content_hash(path)
+            match = self._by_hash.get(digest)
+            if match is not None and match["fingerprint"] == fingerprint:
+                self._entries[key] = dict(match, size=size, mtime=mtime)
+                self._dirty = True
+                self.counters["hits"] += 1
+                return match["features"]
+        self.counters["misses" if entry is None else "stale"] += 1
+        return None
+
+    def put(self, path, fingerprint, features):
+        size, mtime = self._stamp(path)
+        entry = dict(size=size, mtime=mtime, fingerprint=fingerprint, features=features,
+                     hash=self.content_hash(path) if self.check == "hash" else None)
+        self._entries[os.path.abspath(path)] = entry
+        if entry["hash"]:
+            self._by_hash[entry["hash"]] = entry
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        write_pickle(self.path, self._entries)
+        self._dirty = False
+
+    def stats(self):
+        return dict(self.counters, items=len(self._entries))
@@ -1,10 +1,31 @@
 import numpy as np
 import librosa
+from src.feature_registry import FeatureRegistry
+from src.harmonics import HarmonicAnalyzer
 
 class FeatureExtractor:
+    # Bump when extract_all's output changes for the same audio
+    VERSION = 3
+    N_FFT = 2048
+    HOP_LENGTH = 512
+    CONTRAST_BANDS = 6
+    # Feature groups in column order
+    GROUPS = ("mfcc", "delta", "chroma", "contrast", "tonnetz")
 
     @staticmethod
-    def extract_all(y, sr, n_mfcc=20):
+    def fingerprint(n_mfcc=20):
+        # Identifies what extract_all(n_mfcc=...) computes, for FeatureCache
+        return f"{FeatureExtractor.VERSION}|n_mfcc={n_mfcc}|librosa={librosa.__version__}"
+
+    @staticmethod
+    def extract_all(y, sr, n_mfcc=20, groups=None):
+        # One STFT shared by MFCC, chroma, contrast and the HPSS for tonnetz
+        return FeatureExtractor.extract_batch([y], sr, n_mfcc=n_mfcc, dtype=np.float64, groups=groups)[0]
+
+    @staticmethod
+    def extract_all_librosa(y, sr, n_mfcc=20):
+        # The same features from separate librosa calls, each with its own
+        # STFT; the reference extract_all is checked against
         feats = []
 
         # MFCC
@@ -24,15 +45,216 @@ class FeatureExtractor:
             contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
             feats.extend(np.mean(contrast, axis=1))
         except Exception:
-            feats.extend([0, 0, 0, 0, 0, 0])
+            feats.extend([0] * (FeatureExtractor.CONTRAST_BANDS + 1))
 
         # Tonnetz
         try:
             tonnetz = librosa.feature.tonnetz(
-                y=librosa.effects.harmonic(y), sr=sr
+                y=HarmonicAnalyzer.harmonic(y), sr=sr
             )
             feats.extend(np.mean(tonnetz, axis=1))
         except Exception:
             feats.extend([0, 0, 0, 0, 0, 0])
 
         return np.array(feats)
+
+    @staticmethod
+    def _power_to_db(S, valid, top_db=80.0):
+        # librosa.power_to_db(ref=1.0) per clip: the top_db floor is relative
+        # to each clip's own maximum over its valid frames
+        log = 10.0 * np.log10(np.maximum(1e-10, S))
+        top = np.where(valid[:, None, :], log, -np.inf).max(axis=(1, 2))
+        return np.maximum(log, (top - top_db)[:, None, None])
+
+    @staticmethod
+    def _contrast(S, sr, valid, fmin=200.0, quantile=0.02):
+        # librosa.feature.spectral_contrast on a (clips, freqs, frames) batch
+        n_bands = FeatureExtractor.CONTRAST_BANDS
+        freq = librosa.fft_frequencies(sr=sr, n_fft=FeatureExtractor.N_FFT)
+        octa = np.zeros(n_bands + 2)
+        octa[1:] = fmin * (2.0 ** np.arange(0, n_bands + 1))
+        if np.any(octa[:-1] >= 0.5 * sr):
+            raise ValueError("Frequency band exceeds Nyquist")
+        shape = (S.shape[0], n_bands + 1, S.shape[2])
+        valley, peak = np.zeros(shape), np.zeros(shape)
+        for k, (f_low, f_high) in enumerate(zip(octa[:-1], octa[1:])):
+            band = (freq >= f_low) & (freq <= f_high)
+            idx = np.flatnonzero(band)
+            if k > 0:
+                band[idx[0] - 1] = True
+            if k == n_bands:
+                band[idx[-1] + 1:] = True
+            sub = S[:, band, :]
+            if k < n_bands:
+                sub = sub[:, :-1, :]
+            n = int(max(np.rint(quantile * np.sum(band)), 1))
+            sub = np.sort(sub, axis=1)
+            valley[:, k, :] = np.mean(sub[:, :n, :], axis=1)
+            peak[:, k, :] = np.mean(sub[:, -n:, :], axis=1)
+        return FeatureExtractor._power_to_db(peak, valid) - FeatureExtractor._power_to_db(valley, valid)
+
+    @staticmethod
+    def group_sizes(n_mfcc=20):
+        # Width of each feature group, in extract_all's column order
+        return dict(mfcc=n_mfcc, delta=n_mfcc, chroma=12, contrast=FeatureExtractor.CONTRAST_BANDS + 1, tonnetz=6)
+
+    @staticmethod
+    def groups_for(columns, n_mfcc=20):
+        # Groups covering positional columns of extract_all / the builder CSV
+        owner = [g for g, n in FeatureExtractor.group_sizes(n_mfcc).items() for _ in range(n)]
+        wanted = {owner[int(c)] for c in columns}
+        return [g for g in FeatureExtractor.GROUPS if g in wanted]
+
+    @staticmethod
+    def extract_batch(Y, sr, lengths=None, n_mfcc=20, dtype=np.float32, groups=None):
+        # (n_clips, n_features) extract_all rows for many clips at one sample
+        # rate: Y is a padded (n_clips, n_samples) array plus `lengths`, or a
+        # list of 1-D clips. MFCC, deltas, chroma and contrast come from one
+        # batched STFT, with frames past each clip's end masked out of its
+        # means and dB floors. Tonnetz stays per clip: its HPSS median filter
+        # and CQT tuning estimate do not separate across a padded batch, but
+        # the HPSS starts from the clip's slice of the batched STFT.
+        # `groups` (default: all, in GROUPS order) limits what is computed.
+        groups = FeatureExtractor.GROUPS if groups is None else groups
+        if len(Y) == 0:
+            sizes = FeatureExtractor.group_sizes(n_mfcc)
+            return np.zeros((0, sum(sizes[g] for g in groups)), dtype=dtype)
+        if lengths is None:
+            lengths = [len(y) for y in Y]
+        if not isinstance(Y, np.ndarray):
+            clips = [np.asarray(y) for y in Y]
+            Y = np.zeros((len(clips), max(len(y) for y in clips)), dtype=np.result_type(*clips))
+            for i, y in enumerate(clips):
+                Y[i, :len(y)] = y
+        batch = _Batch(Y, sr, np.asarray(lengths), n_mfcc)
+        values = FEATURE_GROUPS.compute(batch, groups)
+        return np.hstack([values[g] for g in groups]).astype(dtype)
+
+
+class _Batch:
+    # Padded clips of one sample rate and the representations derived from
+    # them, each computed on first use; the context FEATURE_GROUPS' producers
+    # read from.
+
+    def __init__(self, Y, sr, lengths, n_mfcc):
+        if lengths.min() < 1:
+            raise ValueError("extract_batch got an empty clip")
+        self.Y, self.sr, self.lengths, self.n_mfcc = Y, sr, lengths, n_mfcc
+        self.n_frames = 1 + lengths // FeatureExtractor.HOP_LENGTH
+        n_total = 1 + Y.shape[-1] // FeatureExtractor.HOP_LENGTH
+        self.valid = np.arange(n_total)[None, :] < self.n_frames[:, None]
+        self._cache = {}
+
+    def _get(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def mean(self, x):
+        # Per-clip mean over valid frames of a (clips, ..., frames) array
+        return np.einsum("k...t,kt->k...", x, self.valid.astype(x.dtype)) / self.n_frames[:, None]
+
+    def stft(self):
+        return self._get("stft", lambda: librosa.stft(
+            self.Y, n_fft=FeatureExtractor.N_FFT, hop_length=FeatureExtractor.HOP_LENGTH))
+
+    def magnitude(self):
+        return self._get("magnitude", lambda: np.abs(self.stft()))
+
+    def power(self):
+        return self._get("power", lambda: self.magnitude() ** 2)
+
+    def mfcc_frames(self):
+        def mfcc():
+            mel = np.einsum("...ft,mf->...mt", self.power(),
+                            librosa.filters.mel(sr=self.sr, n_fft=FeatureExtractor.N_FFT), optimize=True)
+            return librosa.get_fftlib().dct(FeatureExtractor._power_to_db(mel, self.valid),
+                                            axis=-2, type=2, norm="ortho")[:, :self.n_mfcc, :]
+        return self._get("mfcc_frames", mfcc)
+
+    def harmonic(self, i):
+        # HPSS harmonic part of clip i, from its slice of the batched STFT
+        return HarmonicAnalyzer.harmonic(self.Y[i, :self.lengths[i]], stft=self.stft()[i, :, :self.n_frames[i]])
+
+
+# extract_all's feature groups as producers over _Batch; asking for some
+# groups computes only the representations those groups read.
+FEATURE_GROUPS = FeatureRegistry(intermediates=dict(
+    stft=(), magnitude=("stft",), power=("magnitude",), mfcc_frames=("power",), harmonic=("stft",)))
+
+@FEATURE_GROUPS.producer("mfcc", ["mfcc"], needs=("mfcc_frames",))
+def _mfcc(batch):
+    return dict(mfcc=batch.mean(batch.mfcc_frames()))
+
+@FEATURE_GROUPS.producer("delta", ["delta"], needs=("mfcc_frames",))
+def _delta(batch):
+    # Over each clip's own frames, one call per distinct frame count
+    mfccs = batch.mfcc_frames()
+    deltas = np.zeros((len(batch.Y), batch.n_mfcc))
+    for n in np.unique(batch.n_frames):
+        rows = np.flatnonzero(batch.n_frames == n)
+        deltas[rows] = np.mean(librosa.feature.delta(mfccs[rows, :, :n]), axis=-1)
+    return dict(delta=deltas)
+
+@FEATURE_GROUPS.producer("chroma", ["chroma"], needs=("power",))
+def _chroma(batch):
+    # With each clip's own tuning estimate, as chroma_stft does
+    P = batch.power()
+    fbs = {}
+    for i, n in enumerate(batch.n_frames):
+        tuning = librosa.estimate_tuning(S=P[i, :, :n], sr=batch.sr, bins_per_octave=12)
+        if tuning not in fbs:
+            fbs[tuning] = librosa.filters.chroma(sr=batch.sr, n_fft=FeatureExtractor.N_FFT, tuning=tuning)
+        fbs[i] = fbs[tuning]
+    chroma = librosa.util.normalize(
+        np.einsum("kcf,kft->kct", np.stack([fbs[i] for i in range(len(P))]), P, optimize=True),
+        norm=np.inf, axis=-2)
+    return dict(chroma=batch.mean(chroma))
+
+@FEATURE_GROUPS.producer("contrast", ["contrast"], needs=("magnitude",))
+def _contrast(batch):
+    try:
+        return dict(contrast=batch.mean(FeatureExtractor._contrast(batch.magnitude(), batch.sr, batch.valid)))
+    except Exception:
+        return dict(contrast=np.zeros((len(batch.Y), FeatureExtractor.CONTRAST_BANDS + 1)))
+
+@FEATURE_GROUPS.producer("tonnetz", ["tonnetz"], needs=("harmonic",))
+def _tonnetz(batch):
+    tonnetz = np.zeros((len(batch.Y), 6))
+    for i in range(len(batch.Y)):
+        try:
+            tonnetz[i] = np.mean(librosa.feature.tonnetz(y=batch.harmonic(i), sr=batch.sr), axis=1)
+        except Exception:
+            pass
+    return dict(tonnetz=tonnetz)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from src.audio_reader import AudioReader
+    from src.pitch_tracking import PitchTracker
+
+    # python -m src.feature_extraction [cry.wav ...]
+    # Per-clip time and largest relative difference of extract_all (shared
+    # STFT) against extract_all_librosa.
+    SR = 16000
+    rng = np.random.default_rng(0)
+    clips = [(PitchTracker.synthetic_cry(SR, rng.uniform(1, 5), *rng.uniform(300, 600, 2), seed=i)[0], SR)
+             for i in range(20)]
+    clips += [AudioReader.load(p) for p in sys.argv[1:]]
+
+    def timed(fn):
+        out, total = [], 0.0
+        for y, sr in clips:
+            t0 = time.perf_counter()
+            out.append(fn(y, sr))
+            total += time.perf_counter() - t0
+        return np.array(out), 1000 * total / len(clips)
+
+    timed(FeatureExtractor.extract_all)  # warm-up (numba JIT in librosa)
+    ref, t_ref = timed(FeatureExtractor.extract_all_librosa)
+    got, t_got = timed(FeatureExtractor.extract_all)
+    rel = np.abs(got - ref) / np.maximum(np.abs(ref), 1e-3)
+    print(f"{len(clips)} clips: separate STFTs {t_ref:.1f} ms/clip, shared STFT {t_got:.1f} ms/clip  "
+          f"max rel diff {rel.max():.1e}")
@@ -0,0 +1,65 @@
+import numpy as np
+
+class FeatureRegistry:
+    # Declarative map from output columns to the producers that compute
+    # them. A producer is fn(ctx) -> {column: value}, declared with the
+    # columns it yields and the intermediates it reads; intermediates are
+    # declared with their own upstream intermediates. ctx is whatever lazy,
+    # memoizing per-clip object the producers read from (AnalysisContext,
+    # FeatureExtractor's batch state), so an intermediate that several
+    # producers need is still computed once.
+    #
+    # compute(ctx, columns) runs only the producers that own a requested
+    # column, so the consumer's column list decides what gets computed;
+    # plan(columns) shows which producers and intermediates that means.
+
+    def __init__(self, intermediates=None):
+        self.intermediates = dict(intermediates or {})
+        self._producers = {}
+        self._owner = {}
+
+    def producer(self, name, columns, needs=()):
+        unknown = [n for n in needs if n not in self.intermediates]
+        if unknown:
+            raise ValueError(f"Producer '{name}' needs undeclared intermediates {unknown}")
+
+        def register(fn):
+            for c in columns:
+                if c in self._owner:
+                    raise ValueError(f"Column '{c}' is already produced by '{self._owner[c]}'")
+                self._owner[c] = name
+            self._producers[name] = dict(columns=tuple(columns), needs=tuple(needs), fn=fn)
+            return fn
+        return register
+
+    @property
+    def columns(self):
+        return list(self._owner)
+
+    def _upstream(self, names):
+        seen, stack = [], list(names)
+        while stack:
+            n = stack.pop()
+            if n not in seen:
+                seen.append(n)
+                stack.extend(self.intermediates[n])
+        return seen
+
+    def plan(self, columns):
+        # (producers, intermediates) that `columns` require, in registration
+        # order; columns nobody produces are left out (vector() fills 0.0)
+        wanted = {self._owner[c] for c in columns if c in self._owner}
+        producers = [n for n in self._producers if n in wanted]
+        needed = set(self._upstream(n for p in producers for n in self._producers[p]["needs"]))
+        return producers, [n for n in self.intermediates if n in needed]
+
+    def compute(self, ctx, columns=None):
+        columns = self.columns if columns is None else columns
+        out = {}
+        for name in self.plan(columns)[0]:
+            out.update(self._producers[name]["fn"](ctx))
+        return {c: out[c] for c in columns if c in out}
+
+    def vector(self, ctx, columns, dtype=np.float32):
+        values = self.compute(ctx, columns)
+        return np.array([values.get(c, 0.0) for c in columns], dtype=dtype)
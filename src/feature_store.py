@@ -0,0 +1,189 @@
+import json
+import os
+
+import numpy as np
+
+from src.atomic_io import check_format, write_json
+
+class FeatureStore:
+    # Columnar feature table on disk, read back through memory maps:
+    #
+    #   <dir>/schema.json   column names, dtype, row count, label classes
+    #   <dir>/<i>.col       column i, raw little-endian values
+    #   <dir>/label.col     int32 codes into schema["classes"]
+    #
+    # column() is a zero-copy view, so a projection reads only the columns
+    # asked for and class_distribution reads nothing but the labels.
+    # append() writes the columns and then replaces schema.json, whose row
+    # count is the commit point: bytes past it from an interrupted append
+    # are ignored and overwritten by the next one.
+
+    FORMAT_VERSION = 1
+    SCHEMA = "schema.json"
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, self.SCHEMA), encoding="utf-8") as f:
+            self.schema = json.load(f)
+        check_format(self.schema["format"], self.FORMAT_VERSION, "feature store", path)
+        self.dtype = np.dtype(self.schema["dtype"])
+
+    @staticmethod
+    def is_store(path):
+        # Only an existing store directory; anything else is read as a CSV
+        return os.path.isfile(os.path.join(path, FeatureStore.SCHEMA))
+
+    @classmethod
+    def create(cls, path, columns, dtype=np.float32):
+        # New empty store at `path`, replacing any store already there
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith(".col"):
+                os.remove(os.path.join(path, name))
+        schema = dict(format=cls.FORMAT_VERSION, dtype=np.dtype(dtype).newbyteorder("<").str,
+                      columns=[str(c) for c in columns], rows=0, classes=[])
+        cls._write_schema(path, schema)
+        return cls(path)
+
+    @classmethod
+    def _write_schema(cls, path, schema):
+        write_json(os.path.join(path, cls.SCHEMA), schema, indent=1)
+
+    @property
+    def columns(self):
+        return self.schema["columns"]
+
+    @property
+    def classes(self):
+        return self.schema["classes"]
+
+    def __len__(self):
+        return self.schema["rows"]
+
+    def _file(self, i):
+        return os.path.join(self.path, f"{i}.col")
+
+    def _map(self, filename, dtype):
+        if len(self) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, filename), dtype=dtype, mode="r", shape=(len(self),))
+
+    def column(self, name):
+        return self._map(f"{self.columns.index(str(name))}.col", self.dtype)
+
+    def matrix(self, columns=None):
+        # (rows, len(columns)) array; one copy out of the page cache
+        columns = self.columns if columns is None else [str(c) for c in columns]
+        out = np.empty((len(self), len(columns)), dtype=self.dtype)
+        for j, name in enumerate(columns):
+            out[:, j] = self.column(name)
+        return out
+
+    def label_codes(self):
+        return self._map("label.col", np.dtype("<i4"))
+
+    def labels(self):
+        return np.asarray(self.classes, dtype=object)[self.label_codes()]
+
+    def frame(self, columns=None, label=True):
+        # pandas view of a projection, laid out like the builder's CSV
+        import pandas as pd
+
+        columns = self.columns if columns is None else [str(c) for c in columns]
+        data = pd.DataFrame(self.matrix(columns), columns=columns)
+        if label:
+            data["label"] = self.labels()
+        return data
+
+    def append(self, X, labels):
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim != 2 or X.shape[1] != len(self.columns) or len(X) != len(labels):
+            raise ValueError(f"expected ({len(labels)}, {len(self.columns)}) rows, got {X.shape}")
+        classes, codes = encode_labels(self.classes, labels)
+
+        offset = len(self) * self.dtype.itemsize
+        for j in range(len(self.columns)):
+            self._write_at(self._file(j), offset, np.ascontiguousarray(X[:, j]))
+        self._write_at(os.path.join(self.path, "label.col"), len(self) * 4, codes.astype("<i4"))
+        schema = dict(self.schema, rows=len(self) + len(X), classes=classes)
+        self._write_schema(self.path, schema)
+        self.schema = schema
+
+    @staticmethod
+    def _write_at(path, offset, values):
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(values.tobytes())
+
+    @classmethod
+    def from_csv(cls, csv_file, path, dtype=np.float32, chunksize=10000):
+        import pandas as pd
+
+        store = None
+        for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+            X = chunk.drop(columns=["label"])
+            if store is None:
+                store = cls.create(path, X.columns, dtype)
+            store.append(X.to_numpy(), chunk["label"].astype(str).to_numpy())
+        return store
+
+
+def encode_labels(classes, labels):
+    # (classes, int64 codes into them) for `labels`; labels not yet in
+    # `classes` are appended in order of appearance, so existing codes
+    # never change
+    classes = [str(c) for c in classes]
+    index = {c: i for i, c in enumerate(classes)}
+    codes = np.empty(len(labels), dtype=np.int64)
+    for i, label in enumerate(labels):
+        label = str(label)
+        if label not in index:
+            index[label] = len(classes)
+            classes.append(label)
+        codes[i] = index[label]
+    return classes, codes
+
+def feature_columns(source):
+    # Feature column names of a feature store or builder CSV, without reading rows
+    import pandas as pd
+
+    if FeatureStore.is_store(source):
+        return list(FeatureStore(source).columns)
+    return [c for c in pd.read_csv(source, nrows=0).columns if c != "label"]
+
+def load_features(source, columns=None, label=True):
+    # Builder output as a DataFrame with a "label" column, from a feature
+    # store directory or the CSV; `columns` limits the features read.
+    import pandas as pd
+
+    if isinstance(source, pd.DataFrame):
+        return source
+    if FeatureStore.is_store(source):
+        return FeatureStore(source).frame(columns, label)
+    usecols = None
+    if columns is not None:
+        usecols = [str(c) for c in columns] + (["label"] if label else [])
+    return pd.read_csv(source, usecols=usecols)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Convert a builder CSV into a feature store.")
+    parser.add_argument("csv")
+    parser.add_argument("out", help="feature store directory")
+    parser.add_argument("--float64", action="store_true", help="keep double precision (default float32)")
+    args = parser.parse_args()
+
+    store = FeatureStore.from_csv(args.csv, args.out, np.float64 if args.float64 else np.float32)
+    t0 = time.perf_counter()
+    pd.read_csv(args.csv)
+    t1 = time.perf_counter()
+    FeatureStore(args.out).frame()
+    t2 = time.perf_counter()
+    print(f"✅ {len(store)} rows x {len(store.columns)} columns -> {args.out}  "
+          f"(load: CSV {1000 * (t1 - t0):.1f} ms, store {1000 * (t2 - t1):.1f} ms)")
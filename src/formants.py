@@ -0,0 +1,76 @@
+import numpy as np
+
+from src.pitch_tracking import PitchTracker
+
+class FormantTracker:
+    # Frame-wise LPC formants for many frames at once: autocorrelation LPC
+    # solved by a Levinson-Durbin recursion vectorised over frames (the
+    # only loop is over the model order), and all polynomials rooted
+    # together as eigenvalues of a stack of companion matrices. Frames come
+    # from PitchTracker.frames, the grid of the F0 track, so an F0 track can
+    # serve as the voicing mask.
+
+    @staticmethod
+    def levinson(r, order):
+        # (n, >= order+1) autocorrelations -> (n, order+1) LPC polynomials
+        # [1, a1, ..., ap]; frames with zero energy give a = [1, 0, ..., 0].
+        n = len(r)
+        a = np.zeros((n, order + 1))
+        a[:, 0] = 1.0
+        err = r[:, 0].copy()
+        live = err > 1e-12
+        err[~live] = 1.0
+        for i in range(1, order + 1):
+            acc = r[:, i] + np.einsum("nj,nj->n", a[:, 1:i], r[:, i - 1:0:-1])
+            k = np.where(live, -acc / err, 0.0)
+            a[:, 1:i] = a[:, 1:i] + k[:, None] * a[:, i - 1:0:-1]
+            a[:, i] = k
+            err = np.maximum(err * (1.0 - k ** 2), 1e-12)
+        return a
+
+    @staticmethod
+    def roots(a):
+        # (n, p+1) monic polynomials -> (n, p) complex roots
+        p = a.shape[1] - 1
+        companion = np.zeros((len(a), p, p))
+        companion[:, 0, :] = -a[:, 1:]
+        companion[:, np.arange(1, p), np.arange(p - 1)] = 1.0
+        return np.linalg.eigvals(companion)
+
+    @staticmethod
+    def track(y, sr, voiced=None, order=12, frame_length=1024, hop_length=256,
+              fmin=90.0, fmax=5000.0, n_formants=2):
+        # (n_frames, n_formants) formant frequencies in Hz, NaN in frames
+        # that are unvoiced or have fewer than n_formants candidates. y is
+        # expected to be pre-emphasised already.
+        frames = PitchTracker.frames(y, frame_length, hop_length)
+        out = np.full((len(frames), n_formants), np.nan)
+        rows = np.arange(len(frames))
+        if voiced is not None:
+            m = min(len(frames), len(voiced))
+            rows = rows[:m][np.asarray(voiced[:m], dtype=bool)]
+        if len(rows) == 0:
+            return out
+
+        x = frames[rows] * np.hamming(frame_length)
+        # Only order+1 lags are needed; direct products beat a full FFT here
+        r = np.stack([np.einsum("nj,nj->n", x[:, :frame_length - k], x[:, k:])
+                      for k in range(order + 1)], axis=1)
+        z = FormantTracker.roots(FormantTracker.levinson(r, order))
+
+        # Same candidate rule as the single-segment estimate in lpc_formants
+        freqs = np.angle(z) * (sr / (2 * np.pi))
+        ok = (z.imag >= 0.01) & (freqs > fmin) & (freqs < fmax)
+        freqs = np.sort(np.where(ok, freqs, np.inf), axis=1)[:, :n_formants]
+        out[rows] = np.where(np.isfinite(freqs), freqs, np.nan)
+        return out
+
+    @staticmethod
+    def stats(tracks, names=("F1", "F2")):
+        # {F1_mean, F1_std, F2_mean, F2_std} over the frames that have a value
+        feats = {}
+        for name, col in zip(names, np.asarray(tracks).T):
+            v = col[np.isfinite(col)]
+            feats[f"{name}_mean"] = float(np.mean(v)) if len(v) else 0.0
+            feats[f"{name}_std"] = float(np.std(v)) if len(v) else 0.0
+        return feats
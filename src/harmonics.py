@@ -0,0 +1,115 @@
+import time
+
+import numpy as np
+import librosa
+
+class HarmonicAnalyzer:
+    # Harmonic/percussive split and harmonics-to-noise ratio.
+    #
+    # harmonic() is the HPSS harmonic component (librosa.effects.harmonic).
+    # It is not memoized here: callers keep it in their per-clip context
+    # (AnalysisContext for the anomaly features, FeatureExtractor's batch
+    # for tonnetz), which is where a clip's representations are shared.
+    #
+    # HNR comes in two flavours, both returned as an amplitude ratio:
+    #   hpss      mean|harmonic| / mean|y - harmonic|  (what the One-Class
+    #             SVM was trained on)
+    #   autocorr  energy-weighted peak of the normalised autocorrelation in
+    #             the F0 lag range, r, mapped to sqrt(r / (1 - r)); no STFT
+    #             or median filtering, roughly 20x cheaper
+    #
+    # hnr(method="autocorr") rescales the autocorrelation HNR onto the HPSS
+    # scale with a power law fitted on 92 synthetic cries (2-10 harmonics,
+    # 0-30 Hz vibrato, noise from -60 to -10 dB). Rank correlation with HPSS
+    # is 0.91; after rescaling the median error is 13% and the 90th
+    # percentile 72%, worst on fast F0 glides, which HPSS's time-median
+    # filter treats as noise. Rankings agree, absolute values do not, so use
+    # it with a One-Class SVM trained on autocorr HNR rather than HPSS.
+
+    METHODS = ("hpss", "autocorr")
+    AUTOCORR_TO_HPSS = (1.97, 0.70)  # hpss ~= a * autocorr ** b
+    @staticmethod
+    def harmonic(y, stft=None):
+        # stft: librosa.stft(y) with default parameters, when the caller
+        # already has it (same result, one STFT fewer)
+        if stft is None:
+            return librosa.effects.harmonic(y)
+        return librosa.istft(librosa.decompose.hpss(stft)[0], dtype=y.dtype,
+                             n_fft=2 * (stft.shape[-2] - 1), length=len(y))
+
+    @staticmethod
+    def hnr_hpss(y, harm=None):
+        harm = HarmonicAnalyzer.harmonic(y) if harm is None else harm
+        return (np.mean(np.abs(harm)) + 1e-9) / (np.mean(np.abs(y - harm)) + 1e-9)
+
+    @staticmethod
+    def hnr_autocorr(y, sr, fmin=80, fmax=1000, frame_length=1024, hop_length=256):
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) < frame_length:
+            y = np.pad(y, (0, frame_length - len(y)))
+        frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        n_fft = 1 << int(np.ceil(np.log2(2 * frame_length)))
+        spec = np.fft.rfft(frames, n_fft, axis=1)
+        acf = np.fft.irfft(spec.real ** 2 + spec.imag ** 2, n_fft, axis=1)[:, :frame_length]
+        energy = acf[:, 0]
+        lo = max(1, int(sr / fmax))
+        hi = min(frame_length - 1, int(np.ceil(sr / fmin)))
+        # Unbiased normalisation so long lags are not penalised
+        lags = np.arange(lo, hi + 1)
+        r = acf[:, lo:hi + 1] / (energy[:, None] + 1e-12) * frame_length / (frame_length - lags)
+        r = np.clip(r.max(axis=1), 0.0, 0.999)
+        if energy.sum() <= 0:
+            return 1.0  # what hnr_hpss gives for digital silence
+        r_mean = np.sum(r * energy) / np.sum(energy)
+        return float(np.sqrt(r_mean / (1.0 - r_mean)))
+
+    @staticmethod
+    def hnr(y, sr, method="hpss", harm=None, fmin=80, fmax=1000, frame_length=1024, hop_length=256):
+        if method == "hpss":
+            return HarmonicAnalyzer.hnr_hpss(y, harm)
+        if method == "autocorr":
+            a, b = HarmonicAnalyzer.AUTOCORR_TO_HPSS
+            return a * HarmonicAnalyzer.hnr_autocorr(y, sr, fmin, fmax, frame_length, hop_length) ** b
+        raise ValueError(f"Unknown HNR method '{method}', expected one of {HarmonicAnalyzer.METHODS}")
+
+    @staticmethod
+    def compare(clips, sr):
+        # Agreement of the rescaled autocorrelation HNR with the HPSS one on
+        # `clips`: Spearman rank correlation, median and worst relative
+        # error, and per-clip time of each.
+        hpss, auto, t_hpss, t_auto = [], [], 0.0, 0.0
+        for y in clips:
+            t0 = time.perf_counter()
+            hpss.append(HarmonicAnalyzer.hnr_hpss(y, librosa.effects.harmonic(y)))
+            t1 = time.perf_counter()
+            auto.append(HarmonicAnalyzer.hnr(y, sr, "autocorr"))
+            t_hpss, t_auto = t_hpss + t1 - t0, t_auto + time.perf_counter() - t1
+        hpss, auto = np.array(hpss), np.array(auto)
+        rank = lambda v: np.argsort(np.argsort(v))
+        rel = np.abs(auto / hpss - 1)
+        return dict(spearman=float(np.corrcoef(rank(hpss), rank(auto))[0, 1]),
+                    median_rel_error=float(np.median(rel)), max_rel_error=float(rel.max()),
+                    hpss_ms=1000 * t_hpss / len(clips), autocorr_ms=1000 * t_auto / len(clips))
+
+
+if __name__ == "__main__":
+    import sys
+    from src.pitch_tracking import PitchTracker
+
+    # python -m src.harmonics [real_cry.wav ...]
+    SR = 16000
+    rng = np.random.default_rng(1)
+    corpus = {
+        "synthetic": [PitchTracker.synthetic_cry(SR, rng.uniform(1, 5), *rng.uniform(300, 600, 2),
+                                                 vibrato=rng.uniform(0, 30), noise=10 ** rng.uniform(-3, -0.5),
+                                                 seed=i)[0] for i in range(40)],
+    }
+    if len(sys.argv) > 1:
+        corpus["real"] = [librosa.load(p, sr=SR)[0] for p in sys.argv[1:]]
+
+    for name, clips in corpus.items():
+        row = HarmonicAnalyzer.compare(clips, SR)
+        print(f"== {name} ({len(clips)} clips): Spearman {row['spearman']:.3f}  "
+              f"median err {row['median_rel_error']:.1%}  max err {row['max_rel_error']:.1%}  "
+              f"hpss {row['hpss_ms']:.1f} ms  autocorr {row['autocorr_ms']:.1f} ms")
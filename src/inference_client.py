@@ -0,0 +1,73 @@
+import http.client
+import json
+import os
+import socket
+from urllib.parse import urlparse
+
+# Where the UIs send analysis requests: http://host:port or unix:/path/to.sock
+SERVER = os.environ.get("BABYCRY_SERVER", "http://127.0.0.1:8765")
+TIMEOUT = float(os.environ.get("BABYCRY_SERVER_TIMEOUT", 120))
+# Analyze in the UI process when no server is running (loads TensorFlow there)
+LOCAL_FALLBACK = os.environ.get("BABYCRY_LOCAL_FALLBACK", "0") == "1"
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+def _connection(server=SERVER):
+    if server.startswith("unix:"):
+        return _UnixHTTPConnection(server[len("unix:"):])
+    url = urlparse(server)
+    return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=TIMEOUT)
+
+def _request(method, path, body=None, headers=None, server=SERVER):
+    conn = _connection(server)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise RuntimeError(payload.get("error", f"HTTP {response.status}"))
+    return payload
+
+def analyze_remote(audio, server=SERVER):
+    with open(audio, "rb") as f:
+        body = f.read()
+    headers = {"Content-Type": "application/octet-stream", "X-Filename": os.path.basename(audio)}
+    return _request("POST", "/analyze", body, headers, server)["result"]
+
+def server_stats(server=SERVER):
+    return _request("GET", "/stats", server=server)
+
+def analyze(audio):
+    # Drop-in for BabyCryLast.analyze in the UIs: sends the clip to the
+    # inference server, so the UI process never loads the models. Failures
+    # come back as "Error: ..." strings, like the in-process analyze().
+    # Only with BABYCRY_LOCAL_FALLBACK=1 does a UI analyze in-process when
+    # no server is listening; a server that times out is never bypassed.
+    if audio is None:
+        from BabyCryLast import MSG_NO_AUDIO
+        return MSG_NO_AUDIO
+    try:
+        os.stat(audio)
+    except OSError as e:
+        return f"Error: {str(e)}"
+    try:
+        return analyze_remote(audio)
+    except (ConnectionRefusedError, FileNotFoundError) as e:
+        # Nothing listening on the port, or no Unix socket file
+        if not LOCAL_FALLBACK:
+            return f"Error: no inference server at {SERVER} ({e})"
+        print(f"⚠️ No inference server at {SERVER}; analyzing in-process (BABYCRY_LOCAL_FALLBACK=1)")
+        from BabyCryLast import analyze as local_analyze
+        return local_analyze(audio)
+    except (OSError, RuntimeError, ValueError, KeyError) as e:
+        return f"Error: {str(e)}"
@@ -0,0 +1,163 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import BabyCryLast as core
+from src.audio_reader import AudioReader
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+class MicroBatcher:
+    # Coalesces clips from concurrent requests into one core.score_clips()
+    # call: a batch closes when it holds `max_batch` clips or `max_wait_ms`
+    # after its first clip arrived, whichever comes first. Decoding and
+    # feature extraction stay on the request threads; only the model calls
+    # are serialised here.
+
+    def __init__(self, max_batch=16, max_wait_ms=20):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self.counters = dict(batches=0, clips=0, largest_batch=0)
+        threading.Thread(target=self._run, name="babycry-batcher", daemon=True).start()
+
+    def submit(self, prepared):
+        if isinstance(prepared, str):
+            return prepared
+        future = Future()
+        self._queue.put((prepared, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                # One profiler record per batch; the per-clip work is in the
+                # request threads' "analyze" records
+                with core.PROFILER.call("score_batch") as record:
+                    if record is not None:
+                        record["clips"] = len(batch)
+                    results = core.score_clips([p for p, _ in batch])
+            except Exception as e:
+                results = [f"Error: {type(e).__name__}: {e}"] * len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.counters["batches"] += 1
+            self.counters["clips"] += len(batch)
+            self.counters["largest_batch"] = max(self.counters["largest_batch"], len(batch))
+
+    def stats(self):
+        stats = dict(self.counters, max_batch=self.max_batch, max_wait_ms=1000 * self.max_wait)
+        stats["mean_batch"] = stats["clips"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    # POST /analyze   body: audio file bytes  ->  {"result": "..."}
+    # GET  /stats     batching, cache and startup counters
+    # GET  /health    {"ok": true}
+
+    def address_string(self):
+        # Unix-socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json({"ok": True})
+        elif self.path == "/stats":
+            self._send_json({"batcher": self.server.batcher.stats(), "cache": core.cache_stats(),
+                             "startup": core.startup_report()})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path != "/analyze":
+            self._send_json({"error": "not found"}, 404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        # BABYCRY_PROFILE records decode, gates and features per request
+        with core.PROFILER.call("analyze"):
+            try:
+                with core.PROFILER.stage("decode"):
+                    audio = self._decode(body, self.headers.get("X-Filename", "upload.wav"))
+            except Exception as e:
+                self._send_json({"error": f"Could not read audio: {type(e).__name__}: {e}"}, 400)
+                return
+            prepared = core.prepare_clip(audio)
+        self._send_json({"result": self.server.batcher.submit(prepared)})
+
+    @staticmethod
+    def _decode(body, filename):
+        if not body:
+            return None
+        suffix = os.path.splitext(filename)[1] or ".wav"
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(body)
+        try:
+            return AudioReader.load(f.name, core.SR)[0]
+        finally:
+            os.unlink(f.name)
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = self.server_address, 0
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, max_batch=16, max_wait_ms=20):
+    core.load()
+    if unix_socket:
+        server = UnixHTTPServer(unix_socket, InferenceHandler)
+        print(f"✅ BabyCry inference server on unix:{unix_socket}")
+    else:
+        server = ThreadingHTTPServer((host, port), InferenceHandler)
+        print(f"✅ BabyCry inference server on http://{host}:{port}")
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(max_batch, max_wait_ms)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve BabyCry analysis to the UIs over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.socket, args.max_batch, args.max_wait_ms)
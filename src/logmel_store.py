@@ -0,0 +1,264 @@
+import json
+import os
+import queue
+import threading
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+import BabyCryLast as core
+from src.atomic_io import atomic_write, check_format, write_json
+from src.audio_reader import AudioReader
+from src.dataset_builder import DatasetBuilder
+from src.feature_store import encode_labels
+
+class LogMelStore:
+    # CRNN training inputs on disk, in place of one in-memory X pickled to
+    # features.pkl:
+    #
+    #   <dir>/index.json         dtype, sample shape, classes, shard list
+    #   <dir>/shard-00000.npy    (rows, 128, 128) log-mels, float16 by default
+    #   <dir>/shard-00000.json   the shard's label codes and source files
+    #
+    # Shards are opened with np.load(mmap_mode="r"), so only the samples a
+    # batch touches are read. A shard and its labels are written in full
+    # before index.json is replaced, and index.json is the commit point, so
+    # an interrupted build loses at most the shard in progress. Samples come
+    # from core.extract_logmel, the same front-end analyze() uses. Label
+    # codes index `classes`, which build_store sorts like the LabelEncoder
+    # behind label_classes.pkl.
+
+    FORMAT_VERSION = 2
+    INDEX = "index.json"
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, self.INDEX), encoding="utf-8") as f:
+            self.index = json.load(f)
+        # Format 1 kept every label in index.json
+        check_format(self.index["format"], self.FORMAT_VERSION, "log-mel store", path, oldest=2)
+        self._shards = {}
+        self._meta = {}
+        self._offsets = np.cumsum([0] + [s["rows"] for s in self.index["shards"]])
+
+    @classmethod
+    def create(cls, path, dtype=np.float16, shard_size=1024, shape=(core.N_MELS, 128), classes=()):
+        # Labels outside `classes` get the next codes as add_shard meets them
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("shard-"):
+                os.remove(os.path.join(path, name))
+        cls._write_index(path, dict(format=cls.FORMAT_VERSION, dtype=np.dtype(dtype).str, shape=list(shape),
+                                    shard_size=shard_size, classes=[str(c) for c in classes], shards=[]))
+        return cls(path)
+
+    @classmethod
+    def _write_index(cls, path, index):
+        write_json(os.path.join(path, cls.INDEX), index)
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @property
+    def classes(self):
+        return self.index["classes"]
+
+    def _shard_meta(self, i):
+        if i not in self._meta:
+            name = os.path.splitext(self.index["shards"][i]["file"])[0] + ".json"
+            with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                self._meta[i] = json.load(f)
+        return self._meta[i]
+
+    @property
+    def labels(self):
+        codes = [self._shard_meta(i)["labels"] for i in range(len(self.index["shards"]))]
+        return np.asarray([c for shard in codes for c in shard], dtype=np.int64)
+
+    @property
+    def files(self):
+        return [f for i in range(len(self.index["shards"])) for f in self._shard_meta(i)["files"]]
+
+    def add_shard(self, X, labels, files):
+        # Appends (n, 128, 128) log-mels as one new shard
+        X = np.asarray(X, dtype=self.index["dtype"]).reshape((-1,) + tuple(self.index["shape"]))
+        classes, codes = encode_labels(self.classes, labels)
+        n = len(self.index["shards"])
+        name = f"shard-{n:05d}"
+        with atomic_write(os.path.join(self.path, f"{name}.npy")) as f:
+            np.save(f, X)
+        meta = dict(labels=codes.tolist(), files=[str(f) for f in files])
+        write_json(os.path.join(self.path, f"{name}.json"), meta)
+        index = dict(self.index, classes=classes, shards=self.index["shards"] + [dict(file=f"{name}.npy", rows=len(X))])
+        self._write_index(self.path, index)
+        self.index = index
+        self._meta[n] = meta
+        self._offsets = np.append(self._offsets, self._offsets[-1] + len(X))
+
+    def _shard(self, i):
+        if i not in self._shards:
+            self._shards[i] = np.load(os.path.join(self.path, self.index["shards"][i]["file"]), mmap_mode="r")
+        return self._shards[i]
+
+    def take(self, indices):
+        # (len(indices), 128, 128, 1) float32 in the order given
+        indices = np.asarray(indices)
+        out = np.empty((len(indices),) + tuple(self.index["shape"]) + (1,), dtype=np.float32)
+        shard = np.searchsorted(self._offsets, indices, side="right") - 1
+        for s in np.unique(shard):
+            rows = np.flatnonzero(shard == s)
+            local = indices[rows] - self._offsets[s]
+            # Sorted reads are sequential within the shard file
+            order = np.argsort(local)
+            out[rows[order], ..., 0] = self._shard(s)[local[order]]
+        return out
+
+    def split(self, val_fraction=0.2, seed=42):
+        # Stratified (train, val) indices, like train_test_split(stratify=y)
+        rng = np.random.default_rng(seed)
+        labels = self.labels
+        train, val = [], []
+        for c in np.unique(labels):
+            idx = rng.permutation(np.flatnonzero(labels == c))
+            n_val = int(round(val_fraction * len(idx)))
+            val.append(idx[:n_val])
+            train.append(idx[n_val:])
+        return np.sort(np.concatenate(train)), np.sort(np.concatenate(val))
+
+    def batches(self, indices=None, batch_size=32, shuffle=True, seed=0, shuffle_shards=4, prefetch=4):
+        # One epoch of (x, y) batches, assembled ahead by a background
+        # thread. Shuffling is shard-aware: shards in random order, rows
+        # shuffled within a window of `shuffle_shards` shards, so reads stay
+        # local while every epoch's order differs (seed + epoch).
+        indices = np.arange(len(self)) if indices is None else np.asarray(indices)
+        if shuffle:
+            rng = np.random.default_rng(seed)
+            shard = np.searchsorted(self._offsets, indices, side="right") - 1
+            order = rng.permutation(np.unique(shard))
+            windows = [order[i:i + shuffle_shards] for i in range(0, len(order), shuffle_shards)]
+            indices = np.concatenate([rng.permutation(indices[np.isin(shard, w)]) for w in windows])
+        labels = self.labels
+        chunks = [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+
+        q = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+
+        def put(item):
+            # Gives up once the consumer has stopped reading, e.g. Keras
+            # steps_per_epoch or a break, instead of blocking on a full queue
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for idx in chunks:
+                    if not put((self.take(idx), labels[idx])):
+                        return
+            except Exception as e:
+                put(e)
+            put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                item = q.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Drop prefetched batches now rather than when the thread exits
+            while not q.empty():
+                q.get_nowait()
+
+    def keras_dataset(self, indices=None, batch_size=32, shuffle=True, seed=0, prefetch=4):
+        # tf.data.Dataset for model.fit(); each pass over it is one epoch
+        # with a fresh shuffle
+        import tensorflow as tf
+
+        epoch = [0]
+        shape = tuple(self.index["shape"]) + (1,)
+
+        def generate():
+            epoch[0] += 1
+            yield from self.batches(indices, batch_size, shuffle, seed + epoch[0], prefetch=prefetch)
+
+        return tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec((None,) + shape, tf.float32),
+            tf.TensorSpec((None,), tf.int64))).prefetch(tf.data.AUTOTUNE)
+
+
+def _logmel_chunk(paths):
+    # core.extract_logmel output without the batch and channel axes, or None
+    out = []
+    for path in paths:
+        try:
+            y, _ = AudioReader.load(path, core.SR)
+            out.append(core.extract_logmel(y, core.SR)[0, ..., 0])
+        except Exception:
+            out.append(None)
+    return out
+
+def build_store(out_dir, *dataset_dirs, workers=1, shard_size=1024, dtype=np.float16, chunk_size=64):
+    """Write a LogMelStore of every WAV under ``dataset_dirs`` (one subfolder
+    per class, as for DatasetBuilder), in DatasetBuilder.list_files order.
+
+    Returns (samples written, [paths that failed]).
+    """
+    files = DatasetBuilder.list_files(*dataset_dirs)
+    store = LogMelStore.create(out_dir, dtype, shard_size, classes=sorted({label for _, label in files}))
+    chunks = [[p for p, _ in files[i:i + chunk_size]] for i in range(0, len(files), chunk_size)]
+    buf, labels, sources, failed = [], [], [], []
+    t0 = time.perf_counter()
+
+    def flush():
+        store.add_shard(np.stack(buf), labels, sources)
+        buf.clear()
+        labels.clear()
+        sources.clear()
+
+    pool = get_context("spawn").Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap(_logmel_chunk, chunks) if pool else map(_logmel_chunk, chunks)
+        for start, mels in zip(range(0, len(files), chunk_size), results):
+            for (path, label), mel in zip(files[start:start + chunk_size], mels):
+                if mel is None:
+                    failed.append(path)
+                    continue
+                buf.append(mel)
+                labels.append(label)
+                sources.append(path)
+                if len(buf) == shard_size:
+                    flush()
+            done = min(start + chunk_size, len(files))
+            print(f"  {done}/{len(files)} files  {done / (time.perf_counter() - t0):6.1f} files/s")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    if buf:
+        flush()
+    print(f"✅ {len(store)} log-mels in {len(store.index['shards'])} shards -> {out_dir} ({len(failed)} failed)")
+    return len(store), failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a sharded log-mel store for CRNN training.")
+    parser.add_argument("out", help="store directory")
+    parser.add_argument("dirs", nargs="+", help="dataset folders with one subfolder per class")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=1024, help="samples per shard file")
+    parser.add_argument("--float32", action="store_true", help="store float32 (default float16, half the size)")
+    args = parser.parse_args()
+    build_store(args.out, *args.dirs, workers=args.workers, shard_size=args.shard_size,
+                dtype=np.float32 if args.float32 else np.float16)
@@ -0,0 +1,132 @@
+import numpy as np
+import soundfile as sf
+import soxr
+
+import BabyCryLast as core
+from src.audio_reader import AudioReader
+from src.pitch_tracking import PitchTracker
+
+class LongRecordingAnalyzer:
+    # Cry timeline for hours-long recordings with bounded memory.
+    #
+    # Pass 1 block-reads the file, resamples each block to SR with a
+    # streaming resampler and marks FRAME/HOP frames that are both loud
+    # enough and voiced in the cry range (vectorized YIN, not pyin).
+    # Active frames are merged into segments. Pass 2 reads each segment back
+    # from disk on its own and scores it: the CRNN label is the mean of the
+    # probabilities of its 2.5 s windows, and the anomaly flag comes from the
+    # One-Class SVM on the segment's acoustic features. Segments are scored
+    # in batches of core.BATCH_SIZE.
+
+    def __init__(self, block_seconds=30.0, min_cry_s=0.5, max_gap_s=0.4,
+                 pad_s=0.1, max_segment_s=30.0, f0_method=None):
+        self.block_seconds = block_seconds
+        self.min_cry_s = min_cry_s
+        self.max_gap_s = max_gap_s
+        self.pad_s = pad_s
+        self.max_segment_s = max_segment_s
+        self.f0_method = f0_method
+
+    def detect(self, path):
+        # Pass 1: returns [(start_s, end_s), ...] of candidate cry segments.
+        info = sf.info(path)
+        resampler = soxr.ResampleStream(info.samplerate, core.SR, 1, dtype="float32")
+        blocksize = int(self.block_seconds * info.samplerate)
+
+        carry = np.zeros(0, dtype=np.float32)
+        active = []
+        blocks = sf.blocks(path, blocksize=blocksize, dtype="float32", always_2d=True)
+        for i, block in enumerate(blocks):
+            last = (i + 1) * blocksize >= info.frames
+            y = resampler.resample_chunk(block.mean(axis=1), last=last)
+            buf = np.concatenate([carry, y])
+            if len(buf) < core.FRAME:
+                carry = buf
+                continue
+            frames = np.lib.stride_tricks.sliding_window_view(buf, core.FRAME)[::core.HOP]
+            active.append(self._active_frames(frames))
+            carry = buf[len(frames) * core.HOP:]
+
+        active = np.concatenate(active) if active else np.zeros(0, dtype=bool)
+        return self._segments(active)
+
+    def _active_frames(self, frames):
+        rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+        loud = rms >= core.SILENCE_RMS
+        f0 = np.full(len(frames), np.nan)
+        if loud.any():
+            f0[loud] = PitchTracker.yin_frames(frames[loud], core.SR, core.F0_MIN, core.F0_MAX)
+        return loud & (np.nan_to_num(f0) >= core.GATE_F0_MIN)
+
+    def _segments(self, active):
+        # Frame i covers [i*HOP, i*HOP + FRAME) samples at SR
+        fps = core.SR / core.HOP
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], active.astype(np.int8), [0]])))
+        runs = edges.reshape(-1, 2)
+
+        merged = []
+        for start, end in runs:
+            if merged and (start - merged[-1][1]) / fps <= self.max_gap_s:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        duration = (len(active) * core.HOP + core.FRAME) / core.SR
+        segments = []
+        for start, end in merged:
+            t0 = float(max(0.0, start / fps - self.pad_s))
+            t1 = float(min(duration, (end - 1) / fps + core.FRAME / core.SR + self.pad_s))
+            if t1 - t0 < self.min_cry_s:
+                continue
+            while t1 - t0 > self.max_segment_s:
+                segments.append((t0, t0 + self.max_segment_s))
+                t0 += self.max_segment_s
+            segments.append((t0, t1))
+        return segments
+
+    @staticmethod
+    def read_segment(path, start_s, end_s):
+        return AudioReader.load(path, core.SR, offset=start_s, duration=end_s - start_s)[0]
+
+    def _score(self, path, segments):
+        logmels, owners, vectors = [], [], []
+        window = int(core.CLIP_SECONDS * core.SR)
+        for j, (t0, t1) in enumerate(segments):
+            ctx = core.AnalysisContext(self.read_segment(path, t0, t1), core.SR, self.f0_method)
+            for start in range(0, max(len(ctx.y) - window, 0) + 1, window):
+                logmels.append(core.extract_logmel(ctx.y[start:start + window], core.SR))
+                owners.append(j)
+            vectors.append(core.extract_all_features_vector(ctx))
+
+        probs = core.classify_logmels(np.concatenate(logmels))
+        owners = np.array(owners)
+        flags = core.detect_anomalies(np.vstack(vectors))
+        timeline = []
+        for j, (t0, t1) in enumerate(segments):
+            mean_probs = probs[owners == j].mean(axis=0)
+            timeline.append((round(t0, 2), round(t1, 2),
+                             core.labels[int(np.argmax(mean_probs))], bool(flags[j] == -1)))
+        return timeline
+
+    def analyze(self, path):
+        # Returns [(start_s, end_s, label, atypical), ...] in time order.
+        segments = self.detect(path)
+        timeline = []
+        for start in range(0, len(segments), core.BATCH_SIZE):
+            timeline.extend(self._score(path, segments[start:start + core.BATCH_SIZE]))
+        return timeline
+
+
+if __name__ == "__main__":
+    import csv
+    import sys
+
+    # python -m src.long_recording night.wav [timeline.csv]
+    timeline = LongRecordingAnalyzer().analyze(sys.argv[1])
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["start_s", "end_s", "label", "atypical"])
+            writer.writerows(timeline)
+    for t0, t1, label, atypical in timeline:
+        print(f"{t0:9.2f} - {t1:9.2f}  {label:<12} {'⚠️ atypical' if atypical else 'typical'}")
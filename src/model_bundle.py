@@ -0,0 +1,180 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from src.atomic_io import atomic_write, check_format
+
+MAGIC = b"BCBUNDLE"
+FORMAT_VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct("<8sIQ")  # magic, format version, manifest length
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+class ModelBundle:
+    # Single-file container for every runtime artifact.
+    #
+    # Layout: a fixed header, a JSON manifest, then raw little-endian arrays,
+    # each 64-byte aligned. The manifest lists the versions that built the
+    # bundle, each component's metadata (label order, feature column order,
+    # scalar parameters) and, per array, dtype, shape, offset and SHA-256.
+    # Opening a bundle reads only the header and manifest; arrays are views
+    # into one read-only mmap of the file, so nothing is read until it is
+    # used and processes on the same host share the pages.
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, manifest_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a model bundle")
+            check_format(version, FORMAT_VERSION, "bundle", path)
+            self.manifest = json.loads(f.read(manifest_len))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data_start = _aligned(_HEADER.size + manifest_len)
+
+    def component(self, name):
+        # Metadata of one component, e.g. {"labels": [...], "arrays": [...]}
+        if name not in self.manifest["components"]:
+            raise KeyError(f"{self.path} has no '{name}' component")
+        return self.manifest["components"][name]
+
+    def has(self, name):
+        return name in self.manifest["components"]
+
+    def array(self, key):
+        entry = self.manifest["arrays"][key]
+        return np.frombuffer(self._mmap, dtype=np.dtype(entry["dtype"]), count=int(np.prod(entry["shape"])),
+                             offset=self._data_start + entry["offset"]).reshape(entry["shape"])
+
+    def arrays(self, name):
+        # The arrays of one component, as a list or a dict like its manifest entry
+        keys = self.component(name)["arrays"]
+        if isinstance(keys, dict):
+            return {k: self.array(v) for k, v in keys.items()}
+        return [self.array(k) for k in keys]
+
+    def blob(self, key):
+        # Raw bytes that write() stored as a uint8 array, e.g. a legacy pickle
+        return self.array(key).tobytes()
+
+    def verify(self, names=None):
+        # Checks SHA-256 of the arrays of `names` (default: all); touches every page.
+        names = names or list(self.manifest["components"])
+        bad = []
+        for name in names:
+            keys = self.component(name)["arrays"]
+            for key in keys.values() if isinstance(keys, dict) else keys:
+                if hashlib.sha256(self.array(key).tobytes()).hexdigest() != self.manifest["arrays"][key]["sha256"]:
+                    bad.append(key)
+        if bad:
+            raise ValueError(f"Checksum mismatch in {self.path}: {', '.join(bad)}")
+
+    @staticmethod
+    def write(path, components, arrays, versions=None):
+        # components: {name: metadata dict with an "arrays" list/dict of keys}
+        # arrays: {key: ndarray or bytes}
+        index, offset, payload = {}, 0, []
+        for key, value in arrays.items():
+            a = np.frombuffer(value, dtype=np.uint8) if isinstance(value, bytes) else np.asarray(value)
+            a = np.ascontiguousarray(a, dtype=a.dtype.newbyteorder("<"))
+            index[key] = dict(dtype=a.dtype.str, shape=list(a.shape), offset=offset, nbytes=a.nbytes,
+                              sha256=hashlib.sha256(a.tobytes()).hexdigest())
+            payload.append((offset, a))
+            offset = _aligned(offset + a.nbytes)
+
+        manifest = json.dumps(dict(format=FORMAT_VERSION, created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                   versions=versions or {}, components=components, arrays=index),
+                              indent=1).encode("utf-8")
+        data_start = _aligned(_HEADER.size + len(manifest))
+        with atomic_write(path) as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(manifest)))
+            f.write(manifest)
+            for off, a in payload:
+                f.seek(data_start + off)
+                f.write(a.tobytes())
+        return path
+
+
+def build(out_path=None, include_legacy=True):
+    # Bundle the runtime artifacts next to BabyCryLast.py: CRNN weights and
+    # label order, One-Class SVM (as RBFScorer parameters) and feature
+    # order, the approximate scorer when present, and optionally the legacy
+    # pickles as opaque blobs.
+    import pickle
+
+    import BabyCryLast as core
+    from src.anomaly_scoring import RBFScorer
+
+    components, arrays = {}, {}
+    versions = dict(numpy=np.__version__, feature_version=core.FEATURE_VERSION)
+
+    labels = [str(l) for l in core.load_labels()]
+    crnn = core.load_keras_model(len(labels))
+    weights = crnn.get_weights()
+    keys = [f"crnn/{i}" for i in range(len(weights))]
+    arrays.update(zip(keys, weights))
+    components["crnn"] = dict(labels=labels, arrays=keys)
+    import tensorflow as tf
+    versions["tensorflow"] = tf.__version__
+
+    def add_scorer(name, scorer, features):
+        names = ("mean", "scale", "centers", "weights")
+        arrays.update({f"{name}/{k}": getattr(scorer, k) for k in names})
+        components[name] = dict(features=list(features), gamma=scorer.gamma, intercept=scorer.intercept,
+                                arrays={k: f"{name}/{k}" for k in names})
+
+    with open(os.path.join(core.MODEL_DIR, core.AUTISM_FILE), "rb") as f:
+        bundle = pickle.load(f)
+    add_scorer("ocsvm", RBFScorer.exact(bundle["pipeline"]), bundle["features"])
+    import sklearn
+    versions["sklearn"] = sklearn.__version__
+    approx_path = os.path.join(core.MODEL_DIR, core.AUTISM_APPROX_FILE)
+    if os.path.exists(approx_path):
+        with open(approx_path, "rb") as f:
+            approx = pickle.load(f)
+        add_scorer("ocsvm_approx", approx["scorer"], approx["features"])
+
+    if include_legacy:
+        legacy = {}
+        for name in ("RandomForest_model.pkl", "BabyCryModel.pkl", "label.joblib"):
+            path = os.path.join(core.MODEL_DIR, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    arrays[f"legacy/{name}"] = f.read()
+                legacy[name] = f"legacy/{name}"
+        if legacy:
+            components["legacy"] = dict(arrays=legacy)
+
+    return ModelBundle.write(out_path or os.path.join(core.MODEL_DIR, core.BUNDLE_FILE),
+                             components, arrays, versions)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect the single-file model bundle.")
+    parser.add_argument("command", choices=["build", "info", "verify"])
+    parser.add_argument("path", nargs="?", help="bundle path (default: next to BabyCryLast.py)")
+    parser.add_argument("--no-legacy", action="store_true", help="leave out the unused legacy pickles")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(f"✅ {build(args.path, include_legacy=not args.no_legacy)}")
+    else:
+        import BabyCryLast as core
+        b = ModelBundle(args.path or os.path.join(core.MODEL_DIR, core.BUNDLE_FILE))
+        if args.command == "verify":
+            b.verify()
+            print("✅ checksums match")
+        print(f"format {b.manifest['format']}, built {b.manifest['created']}, {b.manifest['versions']}")
+        for name, meta in b.manifest["components"].items():
+            keys = meta["arrays"].values() if isinstance(meta["arrays"], dict) else meta["arrays"]
+            size = sum(b.manifest["arrays"][k]["nbytes"] for k in keys)
+            print(f"  {name:<13} {len(keys):3d} arrays  {size / 2**20:7.2f} MB")
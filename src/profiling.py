@@ -0,0 +1,145 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+class StageProfiler:
+    # Opt-in per-stage timing for the analysis pipeline.
+    #
+    # A call (one analyze / analyze_batch) opens a record; every stage run
+    # inside it adds its wall time to that record. Stages nest, so each one
+    # reports `total_s` (including nested stages) and `self_s` (excluding
+    # them). Every `sample_every`-th call can also be run under cProfile or
+    # tracemalloc, and records are written to `dump_dir` when it is set.
+    # With profiling disabled, stage() and timed() cost one attribute check.
+
+    MODES = (None, "cprofile", "tracemalloc")
+
+    def __init__(self, enabled=False, mode=None, sample_every=1, dump_dir=None, keep=1000):
+        self.records = deque(maxlen=keep)
+        self._local = threading.local()
+        self._sampling = threading.Lock()
+        self._calls = 0
+        if enabled:
+            self.enable(mode, sample_every, dump_dir)
+        else:
+            self.disable()
+
+    def enable(self, mode=None, sample_every=1, dump_dir=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {self.MODES}")
+        self.enabled = True
+        self.mode = mode
+        self.sample_every = max(1, int(sample_every))
+        self.dump_dir = dump_dir
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+
+    def disable(self):
+        self.enabled = False
+        self.mode = None
+        self.dump_dir = None
+
+    @contextmanager
+    def call(self, name, force=False):
+        # Opens a record unless one is already open on this thread, in which
+        # case the stages simply join the outer record.
+        if getattr(self._local, "record", None) is not None or not (self.enabled or force):
+            yield getattr(self._local, "record", None)
+            return
+
+        self._calls += 1
+        record = dict(call=name, seq=self._calls, started=time.time(), stages={})
+        self._local.record, self._local.stack = record, []
+        sampled = self.enabled and self.mode and self._calls % self.sample_every == 0 \
+            and self._sampling.acquire(blocking=False)
+        prof = snapshot = diff = None
+        if sampled and self.mode == "cprofile":
+            prof = cProfile.Profile()
+            prof.enable()
+        elif sampled and self.mode == "tracemalloc":
+            tracemalloc.start()
+            snapshot = tracemalloc.take_snapshot()
+
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["total_s"] = time.perf_counter() - t0
+            if prof is not None:
+                prof.disable()
+            if snapshot is not None:
+                record["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+                diff = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+                tracemalloc.stop()
+            if sampled:
+                self._sampling.release()
+            self._local.record = None
+            self.records.append(record)
+            if self.dump_dir:
+                self._dump(record, prof, diff)
+
+    @contextmanager
+    def stage(self, name):
+        record = getattr(self._local, "record", None)
+        if record is None:
+            yield
+            return
+        stack = self._local.stack
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            entry = record["stages"].setdefault(name, dict(total_s=0.0, self_s=0.0, count=0))
+            entry["total_s"] += elapsed
+            entry["self_s"] += elapsed - nested
+            entry["count"] += 1
+
+    def timed(self, name):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if getattr(self._local, "record", None) is None:
+                    return fn(*args, **kwargs)
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _dump(self, record, prof, diff):
+        base = os.path.join(self.dump_dir, f"{record['call']}-{os.getpid()}-{record['seq']:06d}")
+        with open(base + ".json", "w") as f:
+            json.dump(record, f, indent=2)
+        if prof is not None:
+            prof.dump_stats(base + ".prof")
+        if diff is not None:
+            with open(base + ".tracemalloc.txt", "w") as f:
+                f.writelines(f"{stat}\n" for stat in diff[:30])
+
+    def dump(self, path):
+        # All kept records as JSON lines.
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+
+def latency_ms(predict, x, repeats):
+    # (p50, p99) wall time in ms of `repeats` calls to predict(x)
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        predict(x)
+        times.append(1000 * (time.perf_counter() - t0))
+    return np.percentile(times, 50), np.percentile(times, 99)
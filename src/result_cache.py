@@ -0,0 +1,82 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.atomic_io import write_pickle
+
+class ResultCache:
+    # Content-addressed store for analysis results. Keys hash the decoded
+    # samples together with a version string, so the same audio under a
+    # different path hits and a model or feature change misses. Entries are
+    # dicts holding the final result and the expensive intermediates (F0
+    # track, log-mel, acoustic vector). The memory tier is an LRU of
+    # `max_items` entries; the optional disk tier keeps one pickle per key
+    # under `disk_dir` and is not size-bounded.
+
+    def __init__(self, max_items=256, disk_dir=None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = dict(hits=0, disk_hits=0, misses=0, evictions=0)
+
+    @staticmethod
+    def key(y, sr, version):
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{sr}|{version}|".encode())
+        h.update(np.ascontiguousarray(y, dtype=np.float32).tobytes())
+        return h.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".pkl")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.counters["hits"] += 1
+                return self._mem[key]
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    entry = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                with self._lock:
+                    self.counters["disk_hits"] += 1
+                return entry
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_pickle(path, entry)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._mem[key] = entry
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, items=len(self._mem))
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,147 @@
+import time
+import numpy as np
+import librosa
+
+import BabyCryLast as core
+
+class StreamingAnalyzer:
+    # Continuous monitoring from microphone chunks. Keeps the last
+    # CLIP_SECONDS of audio in a ring buffer and, every `hop_frames` mel
+    # frames, classifies that window with the CRNN after the silence and
+    # cry-structure gates. Mel columns that lie fully inside the window are
+    # computed once per stream and reused by every window that contains
+    # them; only the zero-padded edge columns are recomputed per window, so
+    # the log-mel matches core.extract_logmel on the same window.
+
+    def __init__(self, sr=core.SR, hop_frames=16, f0_method="yin"):
+        # pyin takes about a second per window, so the gate defaults to the
+        # vectorized YIN tracker to keep up with a 0.5 s hop.
+        self.sr = sr
+        self.f0_method = f0_method
+        self.window = int(core.CLIP_SECONDS * sr)
+        self.hop = hop_frames * core.MEL_HOP
+        self.n_cols = 1 + self.window // core.MEL_HOP
+        self.half = core.MEL_N_FFT // 2
+        # Columns whose frame reaches outside the window are zero-padded
+        self.edge = -(-self.half // core.MEL_HOP)
+
+        self._mel_basis = librosa.filters.mel(sr=sr, n_fft=core.MEL_N_FFT, n_mels=core.N_MELS)
+        self._fft_window = librosa.filters.get_window("hann", core.MEL_N_FFT, fftbins=True)
+        self.reset()
+
+    def reset(self):
+        self._ring = np.zeros(self.window, dtype=np.float32)
+        self._pos = 0
+        self.total = 0
+        self._next_emit = self.window
+        self._columns = {}
+
+    def push(self, chunk):
+        # Feed mono float samples at self.sr; returns the results of every
+        # window completed by this chunk (usually zero or one).
+        chunk = np.asarray(chunk, dtype=np.float32).ravel()
+        results = []
+        while len(chunk):
+            n = min(len(chunk), self._next_emit - self.total)
+            self._write(chunk[:n])
+            chunk = chunk[n:]
+            if self.total == self._next_emit:
+                results.append(self._emit())
+                self._next_emit += self.hop
+        return results
+
+    def _write(self, x):
+        if len(x) >= self.window:
+            x = x[-self.window:]
+        end = self._pos + len(x)
+        if end <= self.window:
+            self._ring[self._pos:end] = x
+        else:
+            split = self.window - self._pos
+            self._ring[self._pos:] = x[:split]
+            self._ring[:end - self.window] = x[split:]
+        self._pos = end % self.window
+        self.total += len(x)
+
+    def _current_window(self):
+        return np.concatenate([self._ring[self._pos:], self._ring[:self._pos]])
+
+    def _mel_columns(self, frames):
+        spec = np.abs(np.fft.rfft(frames * self._fft_window, axis=1)) ** 2
+        return (self._mel_basis @ spec.T).astype(np.float32)
+
+    def _logmel(self, y):
+        start = self.total - self.window
+        n_fft, hop, half = core.MEL_N_FFT, core.MEL_HOP, self.half
+
+        # Interior columns, keyed by absolute frame centre
+        interior = range(self.edge, self.n_cols - self.edge)
+        missing = [k for k in interior if start + k * hop not in self._columns]
+        if missing:
+            frames = np.stack([y[k * hop - half:k * hop + half] for k in missing])
+            for k, col in zip(missing, self._mel_columns(frames).T):
+                self._columns[start + k * hop] = col
+        for centre in [c for c in self._columns if c < start + self.edge * hop]:
+            del self._columns[centre]
+
+        # Edge columns see the zero padding of a centred STFT
+        padded = np.pad(y, half)
+        edges = [k for k in range(self.n_cols) if k < self.edge or k >= self.n_cols - self.edge]
+        edge_cols = self._mel_columns(np.stack([padded[k * hop:k * hop + n_fft] for k in edges]))
+
+        mel = np.empty((core.N_MELS, self.n_cols), dtype=np.float32)
+        mel[:, edges] = edge_cols
+        mel[:, list(interior)] = np.stack([self._columns[start + k * hop] for k in interior], axis=1)
+        return core.normalize_logmel(mel)
+
+    def _emit(self):
+        t0 = time.perf_counter()
+        y = self._current_window()
+        ctx = core.AnalysisContext(y, self.sr, self.f0_method).prime(logmel=self._logmel(y))
+        result = dict(end_s=self.total / self.sr, label=None, probs=None)
+
+        msg = core.cry_gate(ctx)
+        if msg is None:
+            probs = core.classify_logmels(ctx.logmel())[0]
+            result.update(label=core.labels[int(np.argmax(probs))], probs=probs,
+                          message=f"Detected: {core.labels[int(np.argmax(probs))]}")
+        else:
+            result["message"] = msg
+        result["latency_s"] = time.perf_counter() - t0
+        return result
+
+
+def build_stream_demo(hop_frames=16):
+    import gradio as gr
+
+    def on_chunk(chunk, analyzer):
+        if analyzer is None:
+            analyzer = StreamingAnalyzer(hop_frames=hop_frames)
+        if chunk is None:
+            return gr.update(), analyzer
+        sr, raw = chunk
+        y = raw.astype(np.float32)
+        if np.issubdtype(raw.dtype, np.integer):
+            y /= np.iinfo(raw.dtype).max
+        if y.ndim > 1:
+            y = y.mean(axis=1)
+        if sr != analyzer.sr:
+            y = librosa.resample(y, orig_sr=sr, target_sr=analyzer.sr)
+        results = analyzer.push(y)
+        if not results:
+            return gr.update(), analyzer
+        last = results[-1]
+        return f"[{last['end_s']:.1f}s] {last['message']}", analyzer
+
+    with gr.Blocks(title="👶 Baby Cry Monitor") as demo:
+        gr.Markdown("## 👶 Baby Cry Monitor\nContinuous analysis of the last 2.5 s of microphone audio.")
+        state = gr.State(None)
+        mic = gr.Audio(sources=["microphone"], streaming=True, label="Live microphone")
+        out = gr.Textbox(label="Current state")
+        mic.stream(on_chunk, inputs=[mic, state], outputs=[out, state])
+    return demo
+
+
+if __name__ == "__main__":
+    core.load_classifier()
+    build_stream_demo().launch()
@@ -0,0 +1,31 @@
+import numpy as np
+
+from src.feature_extraction import FeatureExtractor
+
+SR = 16000
+
+def _clips():
+    rng = np.random.default_rng(0)
+    t = np.arange(SR) / SR
+    a = (0.3 * np.sin(2 * np.pi * 440 * t) + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+    b = (0.2 * np.sin(2 * np.pi * 330 * t[:SR // 2]) + 0.01 * rng.standard_normal(SR // 2)).astype(np.float32)
+    return a, b
+
+def test_extract_batch_list_with_lengths():
+    # A ragged list is padded whether or not lengths are given
+    a, b = _clips()
+    groups = ["mfcc", "chroma"]
+    with_lengths = FeatureExtractor.extract_batch([a, b], SR, lengths=[len(a), len(b)], groups=groups)
+    without = FeatureExtractor.extract_batch([a, b], SR, groups=groups)
+    np.testing.assert_array_equal(with_lengths, without)
+    assert with_lengths.shape == (2, 20 + 12)
+
+def test_extract_batch_empty():
+    assert FeatureExtractor.extract_batch([], SR).shape == (0, sum(FeatureExtractor.group_sizes().values()))
+    assert FeatureExtractor.extract_batch([], SR, groups=["chroma"]).shape == (0, 12)
+
+
+if __name__ == "__main__":
+    test_extract_batch_list_with_lengths()
+    test_extract_batch_empty()
+    print("✅ extract_batch tests passed")
@@ -0,0 +1,162 @@
+import os
+import numpy as np
+
+import BabyCryLast as core
+from src.profiling import latency_ms
+from src.audio_reader import AudioReader
+
+QUANTIZATIONS = ("float32", "float16", "int8")
+
+def _interpreter_class():
+    # Prefer the standalone TFLite runtimes; they load in a fraction of the
+    # time and memory of full TensorFlow.
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return float("nan")
+
+class TFLiteClassifier:
+    # Drop-in for the Keras CRNN in core.classify_logmels.
+
+    def __init__(self, path, num_threads=None):
+        kwargs = {"num_threads": num_threads} if num_threads else {}
+        self.path = path
+        self._interp = _interpreter_class()(model_path=path, **kwargs)
+        self._input = self._interp.get_input_details()[0]["index"]
+        self._output = self._interp.get_output_details()[0]["index"]
+        self._batch = None
+        self.fixed_batch = False
+
+    @staticmethod
+    def model_path(quantization):
+        return os.path.join(core.MODEL_DIR, f"BabyCry_CRNN_Attention_{quantization}.tflite")
+
+    @classmethod
+    def for_backend(cls, backend):
+        # "tflite-int8" -> BabyCry_CRNN_Attention_int8.tflite
+        return cls(cls.model_path(backend.split("-", 1)[1]))
+
+    def _invoke(self, x):
+        if len(x) != self._batch:
+            self._interp.resize_tensor_input(self._input, list(x.shape))
+            self._interp.allocate_tensors()
+            self._batch = len(x)
+        self._interp.set_tensor(self._input, x)
+        self._interp.invoke()
+        return self._interp.get_tensor(self._output).copy()
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if not self.fixed_batch:
+            try:
+                return self._invoke(x)
+            except (RuntimeError, ValueError):
+                # Unrolled exports only run at their exported batch of one
+                self.fixed_batch = True
+                self._batch = None
+        return np.concatenate([self._invoke(x[i:i + 1]) for i in range(len(x))])
+
+
+def calibration_logmels(data_dir, limit=300, seed=0):
+    # Log-mels of up to `limit` WAVs under data_dir, via the inference front-end.
+    paths = sorted(os.path.join(root, f) for root, _, files in os.walk(data_dir)
+                   for f in files if f.endswith(".wav"))
+    rng = np.random.default_rng(seed)
+    if len(paths) > limit:
+        paths = [paths[i] for i in sorted(rng.choice(len(paths), limit, replace=False))]
+    return np.concatenate([core.extract_logmel(AudioReader.load(p, core.SR)[0], core.SR)
+                           for p in paths]).astype(np.float32)
+
+def export(quantization="float16", calibration=None, out_path=None, keras_model=None):
+    # Post-training quantization of the Keras CRNN. int8 needs calibration
+    # log-mels; ops without an int8 kernel fall back to float, and the model
+    # keeps float input and output so callers need no changes.
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+    if keras_model is None:
+        keras_model = core.load_keras_model(len(core.load_labels()))
+    # A fixed batch of one lets the converter fuse the LSTMs into builtin
+    # TFLite ops. int8 calibration crashes on fused LSTMs, so that variant
+    # unrolls them instead (larger file, same weights).
+    fixed = core.build_babycry_model(keras_model.output_shape[-1], batch_size=1,
+                                     unroll=quantization == "int8")
+    fixed.set_weights(keras_model.get_weights())
+    converter = tf.lite.TFLiteConverter.from_keras_model(fixed)
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if calibration is None:
+            raise ValueError("int8 export needs calibration log-mels")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([x[np.newaxis]] for x in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                                               tf.lite.OpsSet.TFLITE_BUILTINS]
+
+    out_path = out_path or TFLiteClassifier.model_path(quantization)
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+def parity_report(logmels, quantizations=QUANTIZATIONS, repeats=50, keras_model=None):
+    # Top-1 agreement and probability error of each TFLite model against the
+    # Keras model, plus batch-of-one latency, file size and resident memory
+    # added by loading it.
+    rss = _rss_mb()
+    if keras_model is None:
+        keras_model = core.load_keras_model(len(core.load_labels()))
+    keras_rss = _rss_mb() - rss
+    ref = keras_model.predict(logmels, verbose=0)
+    p50, p99 = latency_ms(lambda x: keras_model.predict(x, verbose=0), logmels[:1], repeats)
+    report = {"keras": dict(top1_agreement=1.0, max_abs_diff=0.0, mean_abs_diff=0.0,
+                            p50_ms=p50, p99_ms=p99, size_mb=float("nan"), rss_mb=keras_rss)}
+
+    for q in quantizations:
+        path = TFLiteClassifier.model_path(q)
+        rss = _rss_mb()
+        clf = TFLiteClassifier(path)
+        probs = clf.predict(logmels)
+        loaded_rss = _rss_mb() - rss
+        p50, p99 = latency_ms(TFLiteClassifier(path).predict, logmels[:1], repeats)
+        diff = np.abs(probs - ref)
+        report[f"tflite-{q}"] = dict(
+            top1_agreement=float(np.mean(probs.argmax(1) == ref.argmax(1))),
+            max_abs_diff=float(diff.max()), mean_abs_diff=float(diff.mean()),
+            p50_ms=p50, p99_ms=p99, size_mb=os.path.getsize(path) / 2**20, rss_mb=loaded_rss)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export and check TFLite versions of the CRNN.")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("data_dir", help="folder of WAVs for int8 calibration / parity checks")
+    parser.add_argument("--quant", nargs="+", default=list(QUANTIZATIONS), choices=QUANTIZATIONS)
+    parser.add_argument("--limit", type=int, default=300)
+    args = parser.parse_args()
+
+    logmels = calibration_logmels(args.data_dir, args.limit)
+    if args.command == "export":
+        keras_model = core.load_keras_model(len(core.load_labels()))
+        for q in args.quant:
+            print(f"✅ {q}: {export(q, logmels, keras_model=keras_model)}")
+    else:
+        for name, row in parity_report(logmels, args.quant).items():
+            print(f"{name:>15}: top-1 {row['top1_agreement']:.3f}  max|Δp| {row['max_abs_diff']:.4f}  "
+                  f"p50 {row['p50_ms']:6.1f} ms  p99 {row['p99_ms']:6.1f} ms  "
+                  f"size {row['size_mb']:5.1f} MB  rss +{row['rss_mb']:6.1f} MB")
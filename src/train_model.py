@@ -1,14 +1,14 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import seaborn as sns
 import matplotlib.pyplot as plt
+from src.feature_store import load_features
 
 def train_and_evaluate(csv_file):
-    # Load dataset
-    data = pd.read_csv(csv_file)
+    # Load dataset (builder CSV or feature store directory)
+    data = load_features(csv_file)
 
     # Split features and labels
     X = data.drop(columns=["label"])
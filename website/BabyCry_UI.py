@@ -1,7 +1,7 @@
 import gradio as gr
 import json, os, sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from BabyCryLast import analyze
+from src.inference_client import analyze
 
 # Load translations
 with open(os.path.join(os.path.dirname(__file__), "translations.json"), "r", encoding="utf-8") as f:
@@ -12,7 +12,8 @@ ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.append(ROOT)
 
 # Internal imports
-from BabyCryLast import analyze as core_analyze
+from BabyCryLast import load_audio
+from src.inference_client import analyze as core_analyze
 from website.ui_translations import TRANSLATIONS, DEFAULT_TRANSLATIONS, localize_result
 from website.ui_style import PREMIUM_CSS, SPLASH_HTML
 from website.ai_assistant import ask_gpt
@@ -37,7 +38,8 @@ def _render_viz(audio_path: str, label_text: str):
     2. Emotional intensity profile
     3. Calmness vs. distress radar
     """
-    y, sr = librosa.load(audio_path, sr=16000, mono=True)
+    sr = 16000
+    y = load_audio(audio_path, sr)  # decoded here; core_analyze runs in the inference server
     dur = len(y) / sr
 
     # ------------------------------------------------------------
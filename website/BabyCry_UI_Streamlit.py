@@ -1,7 +1,7 @@
 import streamlit as st
 import json, os, sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from BabyCryLast import analyze  # your working function
+from src.inference_client import analyze  # runs in the inference server
 
 # ================================
 # Load Translations
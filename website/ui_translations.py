@@ -7,7 +7,7 @@ import gradio as gr
 # ======================================================================
 ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.append(ROOT)
-from BabyCryLast import analyze as core_analyze  # uses your stable logic
+from src.inference_client import analyze as core_analyze  # runs in the inference server
 
 # ======================================================================
 # Translations (UI + phrase-level postprocessing for results)